@@ -0,0 +1,299 @@
+import itertools
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import extract_speech_full
+import extract_speech_segmented
+from extraction_cache import ExtractionCache, file_hash
+from instrumentation import ExtractionStats, profiled, stage, write_report
+from speech_output import write_manifest, write_speeches
+from tei_stream import play_id
+
+EXTRACTORS = {
+    'full': extract_speech_full.extract_file,
+    'segmented': extract_speech_segmented.extract_file,
+}
+
+
+def list_xml_files(input_folder):
+    """
+    Returns the sorted paths of all XML files in a folder.
+    """
+    return [os.path.join(input_folder, fname) for fname in sorted(os.listdir(input_folder))
+            if fname.lower().endswith('.xml')]
+
+
+def extract_task(task):
+    """
+    Worker entry point: runs one extractor on one file and returns its records,
+    if instrumented its ExtractionStats as a dict and, if requested, its InteractionNetwork.
+    Kept at module level so it can be pickled for the process pool.
+    """
+    mode, file_path, instrument, profile_dir, networks = task
+    stats = ExtractionStats(play_id(file_path), mode) if instrument else None
+    network = None
+    if networks:
+        from interaction import InteractionNetwork
+        network = InteractionNetwork()
+    extract = EXTRACTORS[mode]
+    with stage(stats, 'total'):
+        if profile_dir:
+            profile_path = os.path.join(profile_dir, f'{play_id(file_path)}-{mode}.prof')
+            records = profiled(profile_path, extract, file_path, stats, network)
+        else:
+            records = extract(file_path, stats, network)
+    return file_path, records, stats.as_dict() if stats is not None else None, network
+
+
+def extract_all(file_paths, mode='full', workers=None, chunksize=1, instrument=False, profile_dir=None,
+                networks=False):
+    """
+    Extracts speeches from many TEI files on a process pool.
+    :param mode: 'full' (one record per character) or 'segmented' (per character and act/scene).
+    :param workers: Number of worker processes (default: os.cpu_count()); 1 runs in-process.
+    :param chunksize: Number of files handed to a worker at once.
+    :param instrument: Collect per-stage timings and counters (see instrumentation).
+    :param profile_dir: If given, profile each file with cProfile and write <play>-<mode>.prof there.
+    :param networks: Record each play's scene co-presence and replies (see interaction).
+    :return: A list of (file_path, records, stats, network) tuples in the order of file_paths;
+             stats is an ExtractionStats dict or None if not instrumented, network an
+             InteractionNetwork or None.
+    """
+    if mode not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction mode: {mode}")
+    tasks = [(mode, path, instrument, profile_dir, networks) for path in file_paths]
+    if workers == 1 or len(tasks) <= 1:
+        return [extract_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extract_task, tasks, chunksize=chunksize))
+
+
+def find_name_clashes(paths_by_play):
+    """
+    Returns {path: plays} for output paths that more than one speech would be
+    written to (e.g. segmented files of different plays in one flat folder).
+    :param paths_by_play: Iterable of (play, list of output paths).
+    """
+    owners = {}
+    clashes = {}
+    for play, paths in paths_by_play:
+        for path in paths:
+            key = os.path.normcase(os.path.abspath(path))
+            if key in owners:
+                clashes.setdefault(path, [owners[key]]).append(play)
+            else:
+                owners[key] = play
+    return clashes
+
+
+def _clash_message(clashes):
+    examples = ', '.join(f"{os.path.basename(path)} ({' / '.join(plays)})"
+                         for path, plays in sorted(clashes.items())[:5])
+    return (f"{len(clashes)} speech file names are used more than once: {examples}. "
+            f"Use per-play folders to keep them apart.")
+
+
+def run_batch(input_folder, output_folder, mode='full', workers=None, chunksize=1,
+              per_play_folders=None, manifest_name='manifest.csv', use_cache=True,
+              backend='txt', store_name=None, report_path=None, profile_dir=None, network_prefix=None):
+    """
+    Extracts all TEI files of a folder in parallel and writes the speaker files
+    plus a single manifest from the parent process.
+    :param per_play_folders: Write each play's files to output_folder/<play id>/
+                             (default: only in segmented mode, whose file names are not
+                             unique across plays). Speeches whose files would share a
+                             name raise a ValueError before anything is written.
+    :param use_cache: Skip plays whose XML content is unchanged since the last run
+                      (see extraction_cache) and delete outputs of removed speakers.
+    :param backend: 'txt' writes one file per speech, 'store' writes all speeches
+                    to a single corpus file (see speech_store).
+    :param store_name: File name of the corpus file (default: speeches-<mode>.store).
+    :param report_path: If given, write per-play timings and counters of the extracted
+                        plays to this JSON (or .csv) file.
+    :param profile_dir: If given, write a cProfile dump per extracted play to this folder.
+    :param network_prefix: If given, also write the co-presence and reply networks of all
+                           plays to <network_prefix>_*_EDGES.csv and _NODES.csv in output_folder.
+                           The networks need every play, so unchanged plays are re-extracted.
+    :return: The path of the manifest.
+    """
+    if backend not in ('txt', 'store'):
+        raise ValueError(f"Unknown output backend: {backend}")
+    if per_play_folders is None:
+        per_play_folders = mode == 'segmented'
+    file_paths = list_xml_files(input_folder)
+    cache = ExtractionCache(output_folder, mode) if use_cache else None
+    store_path = os.path.join(output_folder, store_name or f'speeches-{mode}.store')
+
+    def target(file_path):
+        if backend == 'store':
+            return store_path
+        return os.path.join(output_folder, play_id(file_path)) if per_play_folders else output_folder
+
+    cached = {}
+    hashes = {}
+    todo = []
+    for file_path in file_paths:
+        if cache is not None:
+            hashes[file_path] = file_hash(file_path)
+            entry = cache.lookup(play_id(file_path), hashes[file_path], target(file_path))
+            if entry is not None and network_prefix is None:
+                cached[file_path] = entry
+                continue
+        todo.append(file_path)
+
+    results = {}
+    play_stats = {}
+    network = None
+    for file_path, records, stats, play_network in extract_all(todo, mode, workers, chunksize,
+                                                               report_path is not None, profile_dir,
+                                                               network_prefix is not None):
+        results[file_path] = records
+        if stats is not None:
+            play_stats[file_path] = ExtractionStats.from_dict(stats)
+        if play_network is not None:
+            if network is None:
+                network = play_network
+            else:
+                network.merge(play_network)
+
+    if backend == 'txt':
+        planned = ((play_id(file_path), cached[file_path]['paths'] if file_path in cached else
+                    [os.path.join(target(file_path), record['file_name']) for record in results[file_path]])
+                   for file_path in file_paths)
+        clashes = find_name_clashes(planned)
+        if clashes:
+            raise ValueError(_clash_message(clashes))
+
+    previous_store = None
+    if backend == 'store' and cached:
+        from speech_store import SpeechStore
+        previous_store = SpeechStore(store_path)
+
+    all_records = []
+    all_paths = []
+    for file_path in file_paths:
+        play = play_id(file_path)
+        if file_path in cached:
+            if backend == 'store':
+                records = [previous_store.record(i) for i in previous_store.rows('play', play)]
+            else:
+                records = cached[file_path]['records']
+            paths = [store_path] * len(records) if backend == 'store' else cached[file_path]['paths']
+        else:
+            records = results[file_path]
+            if backend == 'store':
+                paths = [store_path] * len(records)
+            else:
+                paths = write_speeches(records, target(file_path), play_stats.get(file_path))
+            if cache is not None:
+                cache.update(play, hashes[file_path], target(file_path), records,
+                             [store_path] if backend == 'store' else paths)
+        all_records.extend(records)
+        all_paths.extend(paths)
+
+    if backend == 'store':
+        if previous_store is not None:
+            previous_store.close()
+        from speech_store import write_store
+        write_store(store_path, all_records)
+
+    removed = []
+    if cache is not None:
+        cache.retain({play_id(file_path) for file_path in file_paths})
+        removed = cache.remove_stale_outputs()
+        cache.save()
+
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_path = os.path.join(output_folder, manifest_name)
+    write_manifest(manifest_path, all_records, all_paths)
+    if report_path is not None:
+        write_report(report_path, [play_stats[file_path].as_dict() for file_path in todo])
+    if network is not None:
+        network.write(os.path.join(output_folder, network_prefix))
+    print(f"Processed: {len(todo)} of {len(file_paths)} files ({len(cached)} unchanged), "
+          f"{len(all_records)} speeches, {len(removed)} stale files removed\n"
+          f"Manifest saved in: {manifest_path}")
+    return manifest_path
+
+
+def update_plays(input_folder, output_folder, plays, mode='full', per_play_folders=None,
+                 manifest_name='manifest.csv'):
+    """
+    Re-extracts only the given plays into a folder kept by run_batch and
+    rebuilds the manifest from the cached entries of all other plays, so the
+    rest of the folder is neither hashed nor read. Plays whose XML file no
+    longer exists are dropped. A play that cannot be parsed (e.g. a file saved
+    half-way) is reported and keeps its previous outputs and cache entry, as
+    does one whose speech files would overwrite those of another play.
+    :param per_play_folders: As in run_batch (default: only in segmented mode).
+    :param plays: Play IDs (file names without .tei.xml/.xml) to update.
+    :return: (manifest path, {play: error message} of the plays that failed).
+    """
+    if mode not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction mode: {mode}")
+    if per_play_folders is None:
+        per_play_folders = mode == 'segmented'
+    file_paths = {play_id(path): path for path in list_xml_files(input_folder)}
+    cache = ExtractionCache(output_folder, mode)
+    failed = {}
+    for play in sorted(plays):
+        file_path = file_paths.get(play)
+        if file_path is None:
+            continue
+        target = os.path.join(output_folder, play) if per_play_folders else output_folder
+        try:
+            content_hash = file_hash(file_path)
+            if cache.lookup(play, content_hash, target) is not None:
+                continue
+            records = EXTRACTORS[mode](file_path)
+        except (ET.ParseError, OSError) as e:
+            failed[play] = str(e)
+            print(f"Skipped {play}: {e}")
+            continue
+        others = ((other, entry['paths']) for other, entry in cache.entries.items() if other != play)
+        clashes = find_name_clashes(itertools.chain(
+            others, [(play, [os.path.join(target, record['file_name']) for record in records])]))
+        if clashes:
+            failed[play] = _clash_message(clashes)
+            print(f"Skipped {play}: {failed[play]}")
+            continue
+        cache.update(play, content_hash, target, records, write_speeches(records, target))
+    cache.retain(set(file_paths))
+    removed = cache.remove_stale_outputs()
+    cache.save()
+
+    all_records = []
+    all_paths = []
+    for play in sorted(cache.entries):
+        all_records.extend(cache.entries[play]['records'])
+        all_paths.extend(cache.entries[play]['paths'])
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_path = os.path.join(output_folder, manifest_name)
+    write_manifest(manifest_path, all_records, all_paths)
+    print(f"Updated: {len(plays)} plays ({len(failed)} failed), "
+          f"{len(removed)} stale files removed\nManifest saved in: {manifest_path}")
+    return manifest_path, failed
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+
+    # Batch settings
+    mode = 'full'
+    workers = None
+    chunksize = 1
+    backend = 'txt'
+    # Per-play timings and counters (JSON or .csv); None disables instrumentation
+    report_path = None
+    # Prefix of the co-presence/reply network files; None skips the networks
+    network_prefix = None
+
+    run_batch(input_folder, output_folder, mode, workers, chunksize, backend=backend,
+              report_path=report_path, network_prefix=network_prefix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+FIXTURES_DIR = os.path.join(SCRIPTS_DIR, 'benchmark_fixtures')
+DEFAULT_BASELINE = os.path.join(FIXTURES_DIR, 'baseline.json')
+BENCHMARKS = ['extract_full', 'extract_segmented', 'wikidata_claims', 'chart_aggregation']
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None where unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def best_of(repeat, fn):
+    """
+    Runs fn repeat times and returns the fastest wall time in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class FixtureClient:
+    """
+    Stand-in for WikidataClient that answers from a fixture of trimmed
+    wbgetentities payloads (the works and authors of the excursus CSVs plus
+    synthetic composer/librettist entities, see its description).
+    Work IDs of the form W<n> are mapped onto the fixture works round-robin,
+    so the claim extraction can be timed at any scale without network access.
+    """
+
+    def __init__(self, path=os.path.join(FIXTURES_DIR, 'wikidata_entities.json')):
+        with open(path, encoding='utf-8') as f:
+            self.entities = json.load(f)['entities']
+        self.works = [e for e in self.entities.values()
+                      if any(p in e['claims'] for p in ('P50', 'P86', 'P87'))]
+
+    def get_entities(self, ids):
+        found = {}
+        for entity_id in ids:
+            if entity_id in self.entities:
+                found[entity_id] = self.entities[entity_id]
+            elif entity_id.startswith('W') and entity_id[1:].isdigit():
+                found[entity_id] = self.works[int(entity_id[1:]) % len(self.works)]
+        return found
+
+
+def bench_extract(mode, options):
+    import extract_speech_full
+    import extract_speech_segmented
+    from synthetic_tei import generate_corpus
+
+    module = extract_speech_full if mode == 'full' else extract_speech_segmented
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    try:
+        paths = generate_corpus(os.path.join(workdir, 'xml'), options['plays'],
+                                options['min_speakers'], options['max_speakers'], seed=options['seed'])
+        size = sum(os.path.getsize(p) for p in paths)
+        output = os.path.join(workdir, 'out')
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for path in paths:
+                    module.process_file(path, output)
+
+        seconds = best_of(options['repeat'], run)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'seconds': seconds, 'items': len(paths), 'unit': 'plays/s', 'mb_per_s': size / 1e6 / seconds}
+
+
+def bench_wikidata_claims(options):
+    from extract_author_wikidata_ids import build_claims_table
+
+    client = FixtureClient()
+    work_ids = [f"W{i}" for i in range(options['works'])]
+    seconds = best_of(options['repeat'], lambda: build_claims_table(work_ids, client))
+    return {'seconds': seconds, 'items': len(work_ids), 'unit': 'works/s'}
+
+
+def bench_chart_aggregation(options):
+    import pandas as pd
+    from works_metadata import aggregate_counts, decade_counts, genre_counts, load_works, top_author_counts
+
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        frame = load_works(os.path.join(REPO_DIR, 'excursus', 'FemAut_works_19th_not_in_DraCor.csv'),
+                           os.path.join(REPO_DIR, 'excursus', 'FemAut_works_19th_in_DraCor.csv'),
+                           cache_path=os.path.join(workdir, 'works.pkl'))
+    copies = max(1, options['chart_rows'] // len(frame))
+    frame = pd.concat([frame] * copies, ignore_index=True)
+
+    def run():
+        counts = aggregate_counts(frame)
+        genre_counts(counts)
+        top_author_counts(counts)
+        decade_counts(counts)
+
+    seconds = best_of(options['repeat'], run)
+    return {'seconds': seconds, 'items': len(frame), 'unit': 'rows/s'}
+
+
+def run_benchmark(name, options):
+    """
+    Runs one benchmark and adds throughput and peak RSS to its result.
+    Meant to run in a fresh child process so that peak RSS is per benchmark.
+    """
+    sys.path.insert(0, SCRIPTS_DIR)
+    if name == 'extract_full':
+        result = bench_extract('full', options)
+    elif name == 'extract_segmented':
+        result = bench_extract('segmented', options)
+    elif name == 'wikidata_claims':
+        result = bench_wikidata_claims(options)
+    elif name == 'chart_aggregation':
+        result = bench_chart_aggregation(options)
+    else:
+        raise ValueError(f"Unknown benchmark: {name}")
+    result['throughput'] = result['items'] / result['seconds']
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the names of benchmarks whose throughput dropped by more than
+    tolerance (a fraction) compared to the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result['throughput'] < reference['throughput'] * (1 - tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for extraction, Wikidata claims and chart data.")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument('--plays', type=int, default=20, help="synthetic plays (1-1000)")
+    parser.add_argument('--min-speakers', type=int, default=10)
+    parser.add_argument('--max-speakers', type=int, default=40, help="up to 200")
+    parser.add_argument('--works', type=int, default=5000, help="works for the claim extraction")
+    parser.add_argument('--chart-rows', type=int, default=100000, help="rows for the chart aggregation")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed throughput drop (fraction)")
+    parser.add_argument('--report', help="write the results as JSON to this path")
+    args = parser.parse_args()
+    options = {k: getattr(args, k) for k in
+               ('plays', 'min_speakers', 'max_speakers', 'works', 'chart_rows', 'repeat', 'seed')}
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in args.only:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_benchmark, (name, options))
+        r = results[name]
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r['peak_rss_mb'] is not None else 'n/a'
+        extra = f", {r['mb_per_s']:.1f} MB/s" if 'mb_per_s' in r else ''
+        print(f"{name:20s} {r['seconds']:8.3f} s  {r['throughput']:12.1f} {r['unit']}{extra}  peak RSS {rss}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline.get('results', {}), args.tolerance)
+    for name in regressions:
+        print(f"REGRESSION: {name} throughput {results[name]['throughput']:.1f} "
+              f"< baseline {baseline['results'][name]['throughput']:.1f} {results[name]['unit']}")
+
+    report = {'options': options, 'results': results, 'regressions': regressions}
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved in: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# Render without a display, also in worker processes
+matplotlib.use('Agg')
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+CHART_FORMATS = ('png', 'svg')
+HASH_FILE_NAME = '.chart-hashes.json'
+# Bump when the drawing code changes, so existing charts are re-rendered
+RENDER_VERSION = 1
+GENDER_COLORS = {'F': '#e67e22', 'M': '#3498db', 'U': '#7f8c8d'}
+
+# Figure and axes per (kind, size, dpi), reused for every chart a process renders
+_TEMPLATES = {}
+
+
+def chart_spec(kind, output, data, style=None, formats=('png',), figsize=(10, 6), dpi=300):
+    """
+    Describes one chart: what to draw (kind and plain-list data), how (style)
+    and where (output path without extension, one file per format).
+    """
+    for fmt in formats:
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unknown chart format: {fmt}")
+    return {'kind': kind, 'output': output, 'data': data, 'style': style or {},
+            'formats': list(formats), 'figsize': list(figsize), 'dpi': dpi}
+
+
+def spec_hash(spec):
+    """
+    Hash of everything that determines the rendered file(s) of a spec.
+    """
+    content = {key: spec[key] for key in ('kind', 'data', 'style', 'figsize', 'dpi')}
+    content['version'] = RENDER_VERSION
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _template(spec):
+    key = (spec['kind'], tuple(spec['figsize']), spec['dpi'])
+    if key not in _TEMPLATES:
+        fig = Figure(figsize=spec['figsize'], dpi=spec['dpi'])
+        FigureCanvasAgg(fig)
+        _TEMPLATES[key] = (fig, fig.add_subplot())
+    fig, ax = _TEMPLATES[key]
+    ax.clear()
+    return fig, ax
+
+
+def _y_ticks(ax, totals):
+    y_max = int(-(-max(totals, default=0) // 5)) * 5
+    ax.set_yticks(range(0, y_max + 5, 5))
+
+
+def draw_grouped_bar(ax, data, style):
+    """
+    Two bars per category side by side (e.g. genres in and not in GerDraCor).
+    """
+    x = list(range(len(data['categories'])))
+    bar_width = style.get('bar_width', 0.35)
+    ax.bar([i - bar_width / 2 for i in x], data['main'], width=bar_width,
+           color=style.get('color_main'), label=style.get('label_main'))
+    ax.bar([i + bar_width / 2 for i in x], data['ger'], width=bar_width,
+           color=style.get('color_ger'), label=style.get('label_ger'))
+    ax.set_xticks(x, data.get('tick_labels', data['categories']))
+    ax.grid(axis='y', linestyle='--', alpha=style.get('grid_alpha', 0.6))
+
+
+def draw_stacked_bar(ax, data, style):
+    """
+    Two stacked bars per position (e.g. works per author or per decade).
+    """
+    x = data.get('positions', list(range(len(data['categories']))))
+    bar_width = style.get('bar_width', 0.6)
+    ax.bar(x, data['main'], color=style.get('color_main'), label=style.get('label_main'), width=bar_width)
+    ax.bar(x, data['ger'], bottom=data['main'], color=style.get('color_ger'),
+           label=style.get('label_ger'), width=bar_width)
+    ax.set_xticks(x, data['categories'], rotation=45, ha='right')
+    grid = {'color': style['grid_color']} if style.get('grid_color') else {}
+    ax.grid(axis='y', linestyle='--', alpha=style.get('grid_alpha', 0.7), **grid)
+    _y_ticks(ax, [m + g for m, g in zip(data['main'], data['ger'])])
+
+
+def draw_ca_scatter(ax, data, style):
+    """
+    Speakers in the first two CA dimensions, coloured by the gender prefix of their label.
+    """
+    colors = [GENDER_COLORS.get(label.split('_', 1)[0], GENDER_COLORS['U']) for label in data['labels']]
+    ax.scatter(data['x'], data['y'], c=colors, s=style.get('marker_size', 20))
+    for label, x, y in zip(data['labels'], data['x'], data['y']):
+        ax.annotate(label, (x, y), fontsize=style.get('font_size', 6), xytext=(3, 3), textcoords='offset points')
+    ax.axhline(0, color='grey', linewidth=0.5)
+    ax.axvline(0, color='grey', linewidth=0.5)
+    ax.set_title(style.get('title', ''))
+
+
+DRAWERS = {
+    'grouped_bar': draw_grouped_bar,
+    'stacked_bar': draw_stacked_bar,
+    'ca_scatter': draw_ca_scatter,
+}
+
+
+def render_chart(spec):
+    """
+    Draws a spec on its reusable figure and writes one file per format.
+    :return: The list of written paths.
+    """
+    fig, ax = _template(spec)
+    style = spec['style']
+    DRAWERS[spec['kind']](ax, spec['data'], style)
+    ax.set_xlabel(style.get('x_label', ''))
+    ax.set_ylabel(style.get('y_label', ''))
+    if style.get('legend', True) and ax.get_legend_handles_labels()[1]:
+        ax.legend()
+    fig.tight_layout()
+
+    os.makedirs(os.path.dirname(os.path.abspath(spec['output'])), exist_ok=True)
+    paths = []
+    for fmt in spec['formats']:
+        path = f"{spec['output']}.{fmt}"
+        fig.savefig(path, format=fmt, dpi=spec['dpi'])
+        paths.append(path)
+    return paths
+
+
+def _load_hashes(folder):
+    path = os.path.join(folder, HASH_FILE_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hashes(folder, hashes):
+    path = os.path.join(folder, HASH_FILE_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_charts(specs, workers=None, chunksize=4, force=False):
+    """
+    Renders chart specs on a process pool (inline for workers == 1 or a single
+    chart). A chart is skipped if all its files exist and the hash of its data
+    and style matches the one stored in the output folder's .chart-hashes.json.
+    :param force: Render every chart regardless of the stored hashes.
+    :return: (written paths, number of skipped charts).
+    """
+    hashes = {}
+    todo = []
+    for spec in specs:
+        folder = os.path.dirname(os.path.abspath(spec['output']))
+        if folder not in hashes:
+            hashes[folder] = _load_hashes(folder)
+        key = os.path.basename(spec['output'])
+        files_exist = all(os.path.exists(f"{spec['output']}.{fmt}") for fmt in spec['formats'])
+        digest = spec_hash(spec)
+        if not force and files_exist and hashes[folder].get(key) == digest:
+            continue
+        todo.append((spec, folder, key, digest))
+
+    if workers == 1 or len(todo) <= 1:
+        results = [render_chart(spec) for spec, _, _, _ in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(render_chart, [spec for spec, _, _, _ in todo], chunksize=chunksize))
+
+    written = []
+    changed = set()
+    for (_, folder, key, digest), paths in zip(todo, results):
+        hashes[folder][key] = digest
+        changed.add(folder)
+        written.extend(paths)
+    for folder in changed:
+        _save_hashes(folder, hashes[folder])
+    return written, len(specs) - len(todo)
+
+
+def ca_chart_specs(ca, bands, output_folder, prefix, formats=('png',)):
+    """
+    Builds one CA scatter spec per MFW band from a CorrespondenceAnalysis
+    (the fits are computed here, the workers only draw).
+    """
+    specs = []
+    for mfw in bands:
+        result = ca.fit(mfw)
+        rows = result['rows']
+        labels = ca.labels or [str(i) for i in range(rows.shape[0])]
+        second = rows[:, 1] if rows.shape[1] > 1 else [0.0] * rows.shape[0]
+        inertia = list(result['inertia']) + [0.0]
+        data = {'labels': list(labels), 'x': [round(float(v), 6) for v in rows[:, 0]],
+                'y': [round(float(v), 6) for v in second]}
+        style = {'title': f"{prefix}: CA, {mfw} MFWs",
+                 'x_label': f"Dim1 ({inertia[0]:.1%})", 'y_label': f"Dim2 ({inertia[1]:.1%})"}
+        output = os.path.join(output_folder, f"{prefix}_CA_{mfw}_MFWs_Culled_0__001")
+        specs.append(chart_spec('ca_scatter', output, data, style, formats, figsize=(10, 10)))
+    return specs
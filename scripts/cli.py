@@ -0,0 +1,203 @@
+import argparse
+import os
+import sys
+
+# Subcommand modules are imported inside the handlers, so a quick extraction
+# run does not pay for pandas, matplotlib or scipy.
+
+
+def cmd_extract(args):
+    mode = 'full' if args.command == 'extract-full' else 'segmented'
+    if os.path.isfile(args.input):
+        # Single file, e.g. from a scheduler reacting to one changed play: only
+        # this play is extracted, the folder's cache and manifest are updated.
+        unsupported = [flag for flag, value in (('--no-cache', args.no_cache),
+                                                 ('--backend', args.backend != 'txt'),
+                                                 ('--store-name', args.store_name),
+                                                 ('--report', args.report),
+                                                 ('--profile-dir', args.profile_dir),
+                                                 ('--network-prefix', args.network_prefix)) if value]
+        if unsupported:
+            args.parser.error(f"{', '.join(unsupported)} cannot be used with a single input file")
+        from batch_extract import update_plays
+        from tei_stream import play_id
+        _, failed = update_plays(os.path.dirname(os.path.abspath(args.input)), args.output,
+                                 {play_id(args.input)}, mode, args.per_play_folders)
+        if failed:
+            sys.exit(1)
+        return
+    from batch_extract import run_batch
+    run_batch(args.input, args.output, mode, args.workers, args.chunksize,
+              per_play_folders=args.per_play_folders, use_cache=not args.no_cache,
+              backend=args.backend, store_name=args.store_name, report_path=args.report,
+              profile_dir=args.profile_dir, network_prefix=args.network_prefix)
+
+
+def cmd_enrich_wikidata(args):
+    from extract_author_wikidata_ids import enrich_works
+    enrich_works(args.input, args.output, args.cache)
+
+
+def cmd_charts(args):
+    from chart_rendering import render_charts
+    from works_metadata import aggregate_counts, load_works
+
+    counts = aggregate_counts(load_works(args.main, args.ger))
+    specs = []
+    if 'genre' in args.only:
+        from visualise_genre_distribution import genre_chart
+        specs.append(genre_chart(counts, args.output, args.format))
+    if 'top-authors' in args.only:
+        from visualise_top_authors import top_authors_chart
+        specs.append(top_authors_chart(counts, args.output, args.format))
+    if 'decades' in args.only:
+        from visualise_works_distribution_by_decade import decade_chart
+        specs.append(decade_chart(counts, args.output, args.format))
+    written, skipped = render_charts(specs, args.workers, force=args.force)
+    print(f"Rendered: {len(written)} files, {skipped} unchanged charts skipped\nResults saved in: {args.output}")
+
+
+def cmd_delta(args):
+    from stylometry import write_delta_sweep
+    write_delta_sweep(args.input, args.output, args.mfw_min, args.mfw_max, args.mfw_incr,
+                      args.measure, args.culling)
+
+
+def cmd_consensus(args):
+    from consensus_tree import write_consensus_tree
+    write_consensus_tree(args.input, args.output, args.prefix, args.mfw_min, args.mfw_max, args.mfw_incr,
+                         args.measure, args.strength, args.workers)
+
+
+def cmd_ca(args):
+    from correspondence_analysis import write_ca_sweep
+    write_ca_sweep(args.input, args.output, args.prefix, args.mfw_min, args.mfw_max, args.mfw_incr,
+                   args.charts or (), args.workers)
+
+
+def cmd_nearest(args):
+    from nearest_neighbours import write_nearest_network
+    write_nearest_network(args.input, args.output, args.prefix, args.mfw_min, args.mfw_max, args.mfw_incr, args.k)
+
+
+def cmd_rolling(args):
+    from rolling_window import write_rolling_curves
+    write_rolling_curves(args.input, args.output, args.mfw, args.measure, args.window, args.step,
+                         args.label_prefix)
+
+
+def cmd_convert_stylo(args):
+    from stylo_tables import convert_stylo_runs
+    convert_stylo_runs(args.input, args.output)
+
+
+def cmd_watch(args):
+    from watch_mode import PlayWatcher
+    watcher = PlayWatcher(args.input, args.output, args.modes, args.mfw, args.measure,
+                          args.interval, args.debounce, args.tolerance)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Speech extraction, Wikidata enrichment, charts and stylometry.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    paths = argparse.ArgumentParser(add_help=False)
+    paths.add_argument('input', help="input folder (or file)")
+    paths.add_argument('output', help="output folder (or file)")
+
+    # Settings as in stylo_config.txt
+    mfw = argparse.ArgumentParser(add_help=False)
+    mfw.add_argument('--mfw-min', type=int, default=100)
+    mfw.add_argument('--mfw-max', type=int, default=1000)
+    mfw.add_argument('--mfw-incr', type=int, default=100)
+
+    measure = argparse.ArgumentParser(add_help=False)
+    measure.add_argument('--measure', choices=['delta', 'eder', 'wurzburg'], default='wurzburg')
+
+    prefix = argparse.ArgumentParser(add_help=False)
+    prefix.add_argument('--prefix', default='all-works', help="prefix of the output file names")
+
+    for name in ('extract-full', 'extract-segmented'):
+        sub = commands.add_parser(name, parents=[paths],
+                                  help=f"extract {name[8:]} speeches from a TEI folder or a single TEI file")
+        sub.add_argument('--workers', type=int, default=None, help="worker processes (default: all CPUs)")
+        sub.add_argument('--chunksize', type=int, default=1)
+        sub.add_argument('--per-play-folders', action=argparse.BooleanOptionalAction, default=None,
+                         help="one subfolder per play (default: only for extract-segmented)")
+        sub.add_argument('--no-cache', action='store_true', help="re-extract unchanged plays")
+        sub.add_argument('--backend', choices=['txt', 'store'], default='txt')
+        sub.add_argument('--store-name')
+        sub.add_argument('--report', help="write per-play timings and counters (JSON or .csv)")
+        sub.add_argument('--profile-dir', help="write a cProfile dump per play")
+        sub.add_argument('--network-prefix', help="also write co-presence and reply networks")
+        sub.set_defaults(handler=cmd_extract, parser=sub)
+
+    sub = commands.add_parser('enrich-wikidata', parents=[paths],
+                              help="add author/librettist/composer IDs and genders to a works list (CSV or Excel)")
+    sub.add_argument('--cache', default='wikidata-cache.sqlite', help="SQLite response cache ('' disables it)")
+    sub.set_defaults(handler=cmd_enrich_wikidata)
+
+    sub = commands.add_parser('charts', help="bar charts of the works lists")
+    sub.add_argument('main', help="CSV of works not in DraCor")
+    sub.add_argument('ger', help="CSV of works in DraCor")
+    sub.add_argument('output', help="output folder")
+    sub.add_argument('--only', nargs='+', choices=['genre', 'top-authors', 'decades'],
+                     default=['genre', 'top-authors', 'decades'])
+    sub.add_argument('--format', nargs='+', choices=['png', 'svg'], default=['png'])
+    sub.add_argument('--workers', type=int, default=None, help="rendering processes (default: all CPUs)")
+    sub.add_argument('--force', action='store_true', help="re-render charts whose data has not changed")
+    sub.set_defaults(handler=cmd_charts)
+
+    sub = commands.add_parser('delta', parents=[paths, mfw, measure], help="distance tables per MFW band")
+    sub.add_argument('--culling', type=int, default=0)
+    sub.set_defaults(handler=cmd_delta)
+
+    sub = commands.add_parser('consensus', parents=[paths, mfw, measure, prefix],
+                              help="bootstrap consensus tree and network edges")
+    sub.add_argument('--strength', type=float, default=0.5)
+    sub.add_argument('--workers', type=int, default=None)
+    sub.set_defaults(handler=cmd_consensus)
+
+    sub = commands.add_parser('ca', parents=[paths, mfw, prefix], help="correspondence analysis per MFW band")
+    sub.add_argument('--charts', nargs='+', choices=['png', 'svg'], help="also render a scatter plot per band")
+    sub.add_argument('--workers', type=int, default=None, help="rendering processes (default: all CPUs)")
+    sub.set_defaults(handler=cmd_ca)
+
+    sub = commands.add_parser('nearest', parents=[paths, mfw, prefix], help="top-k nearest-neighbour network")
+    sub.add_argument('-k', type=int, default=3)
+    sub.set_defaults(handler=cmd_nearest)
+
+    sub = commands.add_parser('rolling', parents=[paths, measure], help="rolling-window Delta curves")
+    sub.add_argument('--mfw', type=int, default=100)
+    sub.add_argument('--window', type=int, default=1000)
+    sub.add_argument('--step', type=int, default=100)
+    sub.add_argument('--label-prefix', default='F_', help="only speakers whose file name starts with this")
+    sub.set_defaults(handler=cmd_rolling)
+
+    sub = commands.add_parser('convert-stylo', parents=[paths],
+                              help="convert archived stylo tables to the binary format")
+    sub.set_defaults(handler=cmd_convert_stylo)
+
+    sub = commands.add_parser('watch', parents=[paths, measure],
+                              help="re-extract and update distances whenever a TEI file changes")
+    sub.add_argument('--modes', nargs='+', choices=['full', 'segmented'], default=['full', 'segmented'])
+    sub.add_argument('--mfw', type=int, default=1000)
+    sub.add_argument('--interval', type=float, default=1.0, help="seconds between polls")
+    sub.add_argument('--debounce', type=float, default=2.0, help="seconds without changes before updating")
+    sub.add_argument('--tolerance', type=float, default=0.01,
+                     help="z-score drift allowed before all distances are recomputed (0: always exact)")
+    sub.set_defaults(handler=cmd_watch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
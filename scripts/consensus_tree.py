@@ -0,0 +1,190 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage
+from scipy.spatial.distance import squareform
+
+from edges import NEIGHBOUR_WEIGHTS, add_edge, neighbour_edges, write_edges_csv
+from stylometry import build_frequency_table, delta_distances, load_speech_folder
+
+# Set in each worker by _init_worker, so the matrix is sent once per process
+_ZSCORES = None
+
+
+def _init_worker(zscores):
+    global _ZSCORES
+    _ZSCORES = zscores
+
+
+def cluster_splits(distances, method='ward'):
+    """
+    Clusters a distance matrix and returns the tree's non-trivial splits as
+    bitsets (int with bit i set for text i). Splits are unrooted: each is
+    stored on the side that does not contain text 0, so the two children of
+    the root are the same split and it is returned only once.
+    """
+    n = distances.shape[0]
+    if n < 4:
+        return []
+    merges = linkage(squareform(distances, checks=False), method=method)
+    everything = (1 << n) - 1
+    clusters = [1 << i for i in range(n)]
+    # Dict as an ordered set
+    splits = {}
+    for left, right, _, size in merges:
+        cluster = clusters[int(left)] | clusters[int(right)]
+        clusters.append(cluster)
+        if 2 <= size <= n - 2:
+            splits[cluster ^ everything if cluster & 1 else cluster] = None
+    return list(splits)
+
+
+def nearest_neighbour_edges(distances, neighbours=NEIGHBOUR_WEIGHTS):
+    """
+    Returns {(i, j): weight} linking every text to its nearest neighbours with
+    the given weights (3, 2, 1 for the 1st, 2nd and 3rd nearest), as in stylo.
+    """
+    masked = distances + np.diag(np.full(distances.shape[0], np.inf))
+    k = min(len(neighbours), distances.shape[0] - 1)
+    order = np.argsort(masked, axis=1, kind='stable')[:, :k]
+    return neighbour_edges(order, weights=neighbours)
+
+
+def band_task(task):
+    """
+    Worker entry point for one MFW band: Delta distances, clustering splits and
+    nearest-neighbour edges.
+    """
+    mfw, measure, method = task
+    distances = delta_distances(_ZSCORES[:, :mfw], measure)
+    return mfw, cluster_splits(distances, method), nearest_neighbour_edges(distances)
+
+
+def run_bands(zscores, bands, measure='wurzburg', method='ward', workers=None):
+    """
+    Runs band_task for all MFW bands, on a process pool unless workers == 1.
+    :return: A list of (mfw, splits, edges) in the order of bands.
+    """
+    tasks = [(mfw, measure, method) for mfw in bands]
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(zscores)
+        return [band_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(zscores,)) as executor:
+        return list(executor.map(band_task, tasks))
+
+
+def majority_splits(split_counts, n_trees, strength=0.5):
+    """
+    Selects the splits of a majority-rule consensus: those found in more than
+    strength of the trees (or in all of them). With strength >= 0.5 the
+    selected splits are always compatible with each other.
+    """
+    return {split: count / n_trees for split, count in split_counts.items()
+            if count / n_trees > strength or count == n_trees}
+
+
+def consensus_newick(labels, splits):
+    """
+    Builds the Newick string of the (unrooted, multifurcating) consensus tree
+    from compatible splits. Node labels hold the split support.
+    """
+    n = len(labels)
+    # Nest clusters from small to large; every cluster becomes a subtree of the
+    # smallest selected cluster containing it.
+    clusters = sorted(splits, key=lambda s: bin(s).count('1'))
+    children = {split: [] for split in clusters}
+    placed = set()
+    for i, split in enumerate(clusters):
+        for larger in clusters[i + 1:]:
+            if split & larger == split:
+                children[larger].append(split)
+                break
+        else:
+            placed.add(split)
+
+    def subtree(split):
+        covered = 0
+        parts = []
+        for child in children[split]:
+            parts.append(subtree(child))
+            covered |= child
+        for leaf in range(n):
+            if split >> leaf & 1 and not covered >> leaf & 1:
+                parts.append(_newick_label(labels[leaf]))
+        return f"({','.join(parts)}){splits[split]:.2f}"
+
+    covered = 0
+    parts = []
+    for split in clusters:
+        if split in placed:
+            parts.append(subtree(split))
+            covered |= split
+    for leaf in range(n):
+        if not covered >> leaf & 1:
+            parts.append(_newick_label(labels[leaf]))
+    return f"({','.join(parts)});"
+
+
+def _newick_label(label):
+    return "'" + label.replace("'", "''") + "'"
+
+
+def consensus_tree(table, mfw_min=100, mfw_max=1000, mfw_incr=100, measure='wurzburg',
+                   strength=0.5, method='ward', workers=None):
+    """
+    Bootstrap consensus tree (stylo's analysis.type = "BCT") over an MFW sweep.
+    :return: (Newick string of the consensus tree, {(label, label): weight} network edges).
+    """
+    mfw_max = min(mfw_max, len(table.words))
+    bands = list(range(mfw_min, mfw_max + 1, mfw_incr))
+    results = run_bands(table.zscores(mfw_max), bands, measure, method, workers)
+
+    split_counts = Counter()
+    edges = {}
+    for _, splits, band_edges in results:
+        split_counts.update(splits)
+        for (i, j), weight in band_edges.items():
+            add_edge(edges, table.labels[i], table.labels[j], weight)
+
+    newick = consensus_newick(table.labels, majority_splits(split_counts, len(bands), strength))
+    return newick, edges
+
+
+def write_consensus_tree(input_folder, output_folder, prefix, mfw_min=100, mfw_max=1000, mfw_incr=100,
+                         measure='wurzburg', strength=0.5, workers=None):
+    """
+    Writes the consensus tree (.tre) and its network edges (_EDGES.csv) for the
+    speech TXT files of a folder, named like stylo's outputs.
+    """
+    table = build_frequency_table(load_speech_folder(input_folder))
+    newick, edges = consensus_tree(table, mfw_min, mfw_max, mfw_incr, measure, strength, workers=workers)
+
+    os.makedirs(output_folder, exist_ok=True)
+    name = f"{prefix}_Consensus_{mfw_min}-{mfw_max}_MFWs_Culled_0__{measure}_C_{strength}"
+    with open(os.path.join(output_folder, f"{name}.tre"), 'w', encoding='utf-8') as f:
+        f.write(newick + '\n')
+    write_edges_csv(os.path.join(output_folder, f"{name}_EDGES.csv"), edges)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+    prefix = "all-works"
+
+    # Settings as in stylo_config.txt
+    mfw_min, mfw_max, mfw_incr = 100, 1000, 100
+    measure = 'wurzburg'
+    strength = 0.5
+    workers = None
+
+    write_consensus_tree(input_folder, output_folder, prefix, mfw_min, mfw_max, mfw_incr,
+                         measure, strength, workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import csv
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, svds
+
+from stylometry import build_frequency_table, load_speech_folder
+
+
+def randomized_svd(matmat, rmatmat, shape, k, oversamples=20, power_iterations=7, seed=0):
+    """
+    Truncated SVD of an implicit matrix given by its products with dense blocks
+    (Halko, Martinsson & Tropp), returning the k leading (U, s, Vt).
+    """
+    rng = np.random.default_rng(seed)
+    n_cols = min(k + oversamples, min(shape))
+    Q, _ = np.linalg.qr(matmat(rng.standard_normal((shape[1], n_cols))))
+    for _ in range(power_iterations):
+        Q, _ = np.linalg.qr(rmatmat(Q))
+        Q, _ = np.linalg.qr(matmat(Q))
+    B = rmatmat(Q).T
+    U_b, s, Vt = np.linalg.svd(B, full_matrices=False)
+    return (Q @ U_b)[:, :k], s[:k], Vt[:k]
+
+
+class CorrespondenceAnalysis:
+    """
+    Correspondence analysis of a sparse speaker x word table whose columns are
+    sorted by corpus frequency, for any MFW cutoff.
+    The standardized residual matrix D_r^-1/2 (P - r c^T) D_c^-1/2 is never
+    formed: it is applied as a sparse product plus a rank-one correction, and
+    only the first k dimensions are computed (randomized or Lanczos SVD).
+    Row masses are accumulated band by band and column masses sliced from the
+    full table's column sums, so both are reused across cutoffs. Results are
+    kept per cutoff, k and SVD method so coordinates can be exported without
+    re-running the decomposition.
+    """
+
+    def __init__(self, counts, labels=None, words=None):
+        self.counts = sparse.csc_matrix(counts, dtype=np.float64)
+        self.labels = labels
+        self.words = words
+        self._row_sums = {0: np.zeros(self.counts.shape[0])}
+        # Column sums of the full table; any cutoff's are a prefix of them
+        self.col_sums = np.asarray(self.counts.sum(axis=0)).ravel()
+        self.results = {}
+
+    def row_sums(self, mfw):
+        """
+        Row sums over the first mfw columns, extended from the largest cached
+        smaller cutoff by summing only the new columns.
+        """
+        if mfw not in self._row_sums:
+            start = max(c for c in self._row_sums if c < mfw)
+            block = self.counts[:, start:mfw]
+            self._row_sums[mfw] = self._row_sums[start] + np.asarray(block.sum(axis=1)).ravel()
+        return self._row_sums[mfw]
+
+    def fit(self, mfw, k=2, method='lanczos'):
+        """
+        Computes the first k CA dimensions for the mfw most frequent words
+        (at most all words of the table).
+        :param method: 'lanczos' (scipy's svds/ARPACK, exact) or 'randomized' (faster,
+                       approximate when the leading singular values are close).
+        :return: A dict with row and column principal coordinates, singular values
+                 and the share of inertia of each dimension.
+        """
+        mfw = min(mfw, self.counts.shape[1])
+        k = min(k, min(self.counts.shape[0], mfw) - 1)
+        key = (mfw, k, method)
+        if key in self.results:
+            return self.results[key]
+        N = self.counts[:, :mfw].tocsr()
+        row_sums = self.row_sums(mfw)
+        total = row_sums.sum()
+        r = row_sums / total
+        c = self.col_sums[:mfw] / total
+        with np.errstate(divide='ignore'):
+            inv_sqrt_r = np.where(r > 0, 1.0 / np.sqrt(r), 0.0)
+            inv_sqrt_c = np.where(c > 0, 1.0 / np.sqrt(c), 0.0)
+        sqrt_r, sqrt_c = np.sqrt(r), np.sqrt(c)
+        # D_r^-1/2 P D_c^-1/2 as one sparse matrix
+        scaled = sparse.diags(inv_sqrt_r / total) @ N @ sparse.diags(inv_sqrt_c)
+
+        def matmat(X):
+            X = X.reshape(mfw, -1)
+            return scaled @ X - np.outer(sqrt_r, sqrt_c @ X)
+
+        def rmatmat(Y):
+            Y = Y.reshape(N.shape[0], -1)
+            return scaled.T @ Y - np.outer(sqrt_c, sqrt_r @ Y)
+
+        if method == 'lanczos':
+            operator = LinearOperator(N.shape, matvec=matmat, rmatvec=rmatmat,
+                                      matmat=matmat, rmatmat=rmatmat, dtype=np.float64)
+            U, s, Vt = svds(operator, k=k)
+            order = np.argsort(-s)
+            U, s, Vt = U[:, order], s[order], Vt[order]
+        elif method == 'randomized':
+            U, s, Vt = randomized_svd(matmat, rmatmat, N.shape, k)
+        else:
+            raise ValueError(f"Unknown SVD method: {method}")
+
+        # Deterministic signs: largest column loading positive in every dimension
+        signs = np.sign(Vt[np.arange(len(s)), np.abs(Vt).argmax(axis=1)])
+        signs[signs == 0] = 1
+        U, Vt = U * signs, Vt * signs[:, None]
+
+        chi2_total = np.asarray(scaled.multiply(scaled).sum()).item() - 1.0  # total inertia
+        result = {
+            'mfw': mfw,
+            'rows': inv_sqrt_r[:, None] * U * s,
+            'columns': inv_sqrt_c[:, None] * Vt.T * s,
+            'singular_values': s,
+            'inertia': s ** 2 / chi2_total if chi2_total > 0 else np.zeros_like(s),
+        }
+        self.results[key] = result
+        return result
+
+    def write_coordinates(self, path, result):
+        """
+        Writes the row (speaker) principal coordinates of a fitted cutoff as CSV.
+        """
+        labels = self.labels or [str(i) for i in range(result['rows'].shape[0])]
+        dims = result['rows'].shape[1]
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['label'] + [f"Dim{d + 1} ({result['inertia'][d]:.1%})" for d in range(dims)])
+            for label, row in zip(labels, result['rows']):
+                writer.writerow([label] + [f'{v:.6f}' for v in row])
+
+
+def write_ca_sweep(input_folder, output_folder, prefix, mfw_min=100, mfw_max=1000, mfw_incr=100,
+                   chart_formats=(), workers=None):
+    """
+    Writes the CA coordinates of every MFW band for the speech TXT files of a folder.
+    :param chart_formats: If given (e.g. ('png',)), also render a scatter plot per band
+                          in these formats on a process pool (see chart_rendering).
+    """
+    table = build_frequency_table(load_speech_folder(input_folder))
+    ca = CorrespondenceAnalysis(table.counts, table.labels, table.words)
+    os.makedirs(output_folder, exist_ok=True)
+    bands = list(range(mfw_min, min(mfw_max, len(table.words)) + 1, mfw_incr))
+    for mfw in bands:
+        result = ca.fit(mfw)
+        ca.write_coordinates(os.path.join(output_folder, f"{prefix}_CA_{mfw}_MFWs_Culled_0__coordinates.csv"), result)
+    if chart_formats:
+        from chart_rendering import ca_chart_specs, render_charts
+        render_charts(ca_chart_specs(ca, bands, output_folder, prefix, chart_formats), workers)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+    prefix = "all-works"
+
+    # Settings as in stylo_config.txt
+    mfw_min, mfw_max, mfw_incr = 100, 1000, 100
+
+    write_ca_sweep(input_folder, output_folder, prefix, mfw_min, mfw_max, mfw_incr)
+
+
+if __name__ == '__main__':
+    main()
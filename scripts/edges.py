@@ -0,0 +1,63 @@
+import csv
+
+EDGE_FIELDS = ['Source', 'Target', 'Weight', 'Type']
+# Weights of the 1st, 2nd and 3rd nearest neighbour in stylo's network output
+NEIGHBOUR_WEIGHTS = (3, 2, 1)
+
+
+def add_edge(edges, a, b, weight):
+    """
+    Adds weight to the undirected edge between labels a and b in an {(source, target): weight} dict.
+    The pair is stored in sorted order, as in the stylo EDGES files.
+    """
+    if a == b:
+        return
+    key = (a, b) if a < b else (b, a)
+    edges[key] = edges.get(key, 0) + weight
+
+
+def neighbour_edges(indices, labels=None, weights=None):
+    """
+    Returns {(source, target): weight} linking every text to its nearest
+    neighbours, given as one row of neighbour indices per text (nearest first).
+    The r-th nearest of k gets weights[r]; by default k - r + 1, i.e. 3, 2, 1
+    for k = 3 as in stylo's network edges.
+    :param labels: Node labels by index; without them the indices are the nodes.
+    """
+    weights = weights or tuple(range(len(indices[0]) if len(indices) else 0, 0, -1))
+    edges = {}
+    for i, row in enumerate(indices):
+        for rank, j in enumerate(row):
+            j = int(j)
+            add_edge(edges, labels[i] if labels is not None else i,
+                     labels[j] if labels is not None else j, weights[rank])
+    return edges
+
+
+def write_edges_csv(path, edges, edge_type='undirected', extra_columns=None):
+    """
+    Writes an {(source, target): weight} dict in stylo's Source,Target,Weight,Type format.
+    Integral weights are written without decimals, like stylo does.
+    :param extra_columns: Optional {column name: {(source, target): value}} appended after Type.
+    """
+    extra_columns = extra_columns or {}
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(EDGE_FIELDS + list(extra_columns))
+        for (source, target), weight in sorted(edges.items()):
+            if float(weight).is_integer():
+                weight = int(weight)
+            row = [source, target, weight, edge_type]
+            row += [values.get((source, target), '') for values in extra_columns.values()]
+            writer.writerow(row)
+
+
+def read_edges_csv(path):
+    """
+    Reads an EDGES CSV into an {(source, target): weight} dict.
+    """
+    edges = {}
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            edges[(row['Source'], row['Target'])] = float(row['Weight'])
+    return edges
@@ -1,26 +1,30 @@
-import requests
 import pandas as pd
-import time
 import os
 
+from wikidata_client import WikidataClient
+
 # Configuration: Paths for input and output files
 input_file = r"E:\python\input"
 output_file = r"E:\python\output"
-
-def fetch_wikidata_entity(entity_id):
-    """
-    Fetches JSON data for an entity from Wikidata.
-    :param entity_id: The Wikidata ID of the work (e.g., Q12345)
-    :return: A dictionary with JSON data or None if an error occurs.
-    """
-    url = f"https://www.wikidata.org/wiki/Special:EntityData/{entity_id}.json"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Checks for HTTP errors.
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching {entity_id}: {e}")
-        return None
+cache_file = r"E:\python\wikidata-cache.sqlite"
+
+# Properties to extract: (property key, column for the person IDs, column for their sex or gender)
+PROPERTIES = [
+    ('P50', 'Author_P50', 'sex-or-gender'),
+    ('P87', 'Librettist_P87', 'sex-or-gender-2'),
+    ('P86', 'Composer_P86', 'sex-or-gender-3'),
+]
+# Same properties with the column names of the excursus CSVs
+CSV_PROPERTIES = [
+    ('P50', 'author-wikidata-id', 'sex-or-gender'),
+    ('P87', 'librettist-id', 'sex-or-gender-2'),
+    ('P86', 'composer-id', 'sex-or-gender-3'),
+]
+# Column of the work IDs: (Excel, CSV)
+WORK_ID_COLUMNS = ('wikidataId', 'work-wikidata-id')
+SEX_OR_GENDER = 'P21'
+# Labels used in the excursus CSVs for the most common P21 values
+GENDER_LABELS = {'Q6581072': 'female', 'Q6581097': 'male'}
 
 def extract_person_ids(claims, property_key):
     """
@@ -40,77 +44,149 @@ def extract_person_ids(claims, property_key):
                     person_ids.append(value['id'])
     return person_ids
 
-def main():
-    # Check if the input file exists
-    if not os.path.exists(input_file):
-        print(f"File {input_file} not found.")
-        return
+def extract_claims(claims, property_keys):
+    """
+    Extracts the item IDs of several properties from an entity's claims in one pass.
+    :param claims: The 'claims' dictionary from Wikidata data.
+    :param property_keys: The property keys to extract (e.g., ['P50', 'P86']).
+    :return: A dict mapping each property key to its list of IDs.
+    """
+    return {key: extract_person_ids(claims, key) for key in property_keys}
 
-    # Load the Excel file
-    try:
-        df = pd.read_excel(input_file)
-    except Exception as e:
-        print(f"Error loading Excel file: {e}")
-        return
 
-    # Ensure the column 'wikidataId' exists
-    if 'wikidataId' not in df.columns:
-        print("Column 'wikidataId' not found in the Excel file.")
-        return
+def resolve_genders(client, person_ids):
+    """
+    Resolves the sex or gender (P21) of persons through the client's cache.
+    :return: A dict mapping each person ID to a label ('female', 'male' or the
+             English label of the P21 value) or None if no P21 claim exists.
+    """
+    persons = client.get_entities(person_ids)
+    gender_ids = {pid: extract_person_ids(entity.get('claims', {}), SEX_OR_GENDER)
+                  for pid, entity in persons.items()}
+    other_ids = {gid for gids in gender_ids.values() for gid in gids if gid not in GENDER_LABELS}
+    labels = dict(GENDER_LABELS)
+    for gid, entity in client.get_entities(other_ids).items():
+        labels[gid] = entity.get('labels', {}).get('en', {}).get('value', gid)
+    # P21 values whose lookup failed are kept as their ID
+    return {pid: ', '.join(labels.get(gid, gid) for gid in gids) or None for pid, gids in gender_ids.items()}
+
+
+def build_claims_table(work_ids, client, properties=PROPERTIES):
+    """
+    Builds a DataFrame with the person IDs and their sex or gender for each work.
+    Every work's claims are walked once; results are collected in columnar lists
+    and turned into a DataFrame in one go.
+    :param work_ids: Wikidata IDs of the works, one per row of the output.
+    :param properties: (property key, ID column, gender column) tuples.
+    """
+    entities = client.get_entities(work_ids)
+    property_keys = [key for key, _, _ in properties]
+
+    columns = {key: [] for key in property_keys}
+    for work_id in work_ids:
+        entity = entities.get(work_id)
+        if entity is None or 'missing' in entity:
+            for key in property_keys:
+                columns[key].append([])
+            continue
+        for key, ids in extract_claims(entity.get('claims', {}), property_keys).items():
+            columns[key].append(ids)
 
-    # Add new columns for output
-    df['Author_P50'] = None
-    df['Composer_P86'] = None
-    df['Librettist_P87'] = None
+    person_ids = {pid for ids_per_work in columns.values() for ids in ids_per_work for pid in ids}
+    genders = resolve_genders(client, person_ids)
 
-    # Process each row (each work)
-    for idx, row in df.iterrows():
-        entity_id = row['wikidataId']
-        print(f"Processing work ID: {entity_id}")
+    table = {}
+    for key, id_column, gender_column in properties:
+        table[id_column] = [', '.join(ids) or None for ids in columns[key]]
+        table[gender_column] = [
+            ', '.join(genders.get(pid) or 'unknown' for pid in ids) or None for ids in columns[key]
+        ]
+    return pd.DataFrame(table)
 
-        # Fetch Wikidata data
-        data = fetch_wikidata_entity(entity_id)
-        if data is None:
-            print(f"  No data received for {entity_id}.")
+
+def fill_genders(df, client, properties):
+    """
+    Fills empty gender columns of rows that already have person IDs (e.g. the
+    author IDs of a works list without work IDs). Filled values are kept.
+    """
+    for _, id_column, gender_column in properties:
+        if id_column not in df.columns:
             continue
+        if gender_column not in df.columns:
+            df[gender_column] = None
+        missing = df[id_column].notna() & df[gender_column].isna()
+        ids = {pid: [i.strip() for i in str(pid).split(',') if i.strip()] for pid in df.loc[missing, id_column]}
+        genders = resolve_genders(client, {i for split in ids.values() for i in split})
+        df.loc[missing, gender_column] = [
+            ', '.join(genders.get(i) or 'unknown' for i in ids[pid]) or None for pid in df.loc[missing, id_column]
+        ]
 
-        # Access entity data and claims
-        entity_data = data.get('entities', {}).get(entity_id, {})
-        claims = entity_data.get('claims', {})
 
-        # Extract author (P50)
-        author_ids = extract_person_ids(claims, 'P50')
-        if author_ids:
-            df.at[idx, 'Author_P50'] = ', '.join(author_ids)
-            print(f"  Author(s): {author_ids}")
-        else:
-            print("  No authors found.")
+def enrich_works(input_file, output_file, cache_file=None):
+    """
+    Adds the author, librettist and composer IDs of every work and their sex or
+    gender to a works list and saves it as output_file.
+    Excel files (.xlsx) use the columns wikidataId, Author_P50, Librettist_P87 and
+    Composer_P86; CSV files the schema of the excursus CSVs (work-wikidata-id,
+    author-wikidata-id, librettist-id, composer-id). Without a work ID column,
+    only the genders of the persons already listed are filled in.
+    :param cache_file: SQLite file for cached Wikidata responses, or None to disable caching.
+    """
+    # Check if the input file exists
+    if not os.path.exists(input_file):
+        print(f"File {input_file} not found.")
+        return
 
-        # Extract composer (P86)
-        composer_ids = extract_person_ids(claims, 'P86')
-        if composer_ids:
-            df.at[idx, 'Composer_P86'] = ', '.join(composer_ids)
-            print(f"  Composer(s): {composer_ids}")
-        else:
-            print("  No composers found.")
+    is_csv = input_file.lower().endswith('.csv')
+    properties = CSV_PROPERTIES if is_csv else PROPERTIES
+    work_column = WORK_ID_COLUMNS[is_csv]
 
-        # Extract librettist (P87)
-        librettist_ids = extract_person_ids(claims, 'P87')
-        if librettist_ids:
-            df.at[idx, 'Librettist_P87'] = ', '.join(librettist_ids)
-            print(f"  Librettist(s): {librettist_ids}")
-        else:
-            print("  No librettists found.")
+    # Load the works list
+    try:
+        df = pd.read_csv(input_file, encoding='utf-8', dtype=str) if is_csv else pd.read_excel(input_file)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return
 
-        # Short pause to avoid overloading the API
-        time.sleep(0.1)
+    # Ensure there is something to look up
+    if work_column not in df.columns and not any(c in df.columns for _, c, _ in properties):
+        print(f"Neither '{work_column}' nor a person ID column found in {input_file}.")
+        return
 
-    # Save processed data to a new Excel file
+    with WikidataClient(cache_path=cache_file) as client:
+        if work_column in df.columns:
+            # Fetch all works and their persons at once (batched, rate-limited and cached)
+            work_ids = [str(i).strip() if pd.notna(i) else '' for i in df[work_column]]
+            claims_df = build_claims_table(work_ids, client, properties)
+            claims_df.index = df.index
+
+            # Add the ID columns; existing (manually curated) values take precedence.
+            # Genders are then resolved for the final IDs, so they always match.
+            for _, column, _ in properties:
+                if column in df.columns:
+                    df[column] = df[column].where(df[column].notna(), claims_df[column])
+                else:
+                    df[column] = claims_df[column]
+        fill_genders(df, client, properties)
+
+    for _, id_column, gender_column in properties:
+        if id_column in df.columns:
+            print(f"{gender_column}: known for {df[gender_column].notna().sum()} of {len(df)} works")
+
+    # Save processed data in the format of the input
     try:
-        df.to_excel(output_file, index=False)
+        if is_csv:
+            df.to_csv(output_file, index=False, encoding='utf-8')
+        else:
+            df.to_excel(output_file, index=False)
         print(f"\nResults successfully saved to '{output_file}'.")
     except Exception as e:
         print(f"Error saving file: {e}")
 
+
+def main():
+    enrich_works(input_file, output_file, cache_file)
+
+
 if __name__ == "__main__":
     main()
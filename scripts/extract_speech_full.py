@@ -1,6 +1,8 @@
-import os
 import re
-import xml.etree.ElementTree as ET
+
+from instrumentation import stage
+from speech_output import write_speeches
+from tei_stream import TeiStream, extract_text_without_stage, play_id, sp_speakers
 
 
 def convert_ordinal(ordinal_str):
@@ -17,19 +19,6 @@ def convert_ordinal(ordinal_str):
     return mapping.get(token, token)
 
 
-def extract_text_without_stage(elem):
-    """
-    Recursively extracts the text of an element, ignoring content from <stage> and <speaker> elements.
-    """
-    text = elem.text or ""
-    for child in elem:
-        if not (child.tag.endswith('stage') or child.tag.endswith('speaker')):
-            text += extract_text_without_stage(child)
-        if child.tail:
-            text += child.tail
-    return text
-
-
 def build_person_mappings(root, NS):
     """
     Creates mappings from character IDs to full names and to gender labels.
@@ -62,21 +51,30 @@ def sanitize_filename(name):
     return re.sub(r'[\\/:*?"<>|]', '_', name)
 
 
-def process_sp(sp, speaker_map, speeches, NS):
+def process_sp(sp, speaker_map, speeches, NS, token_counts=None, stats=None):
     """
     Extracts the speech text from a <sp> block and accumulates it per speaker ID.
+    If token_counts is given, whitespace token counts are accumulated per speaker ID as well;
+    stats (ExtractionStats) receives the time spent in extract_text_without_stage.
+    :return: The number of whitespace tokens of the speech.
     """
-    who_attr = sp.get('who', '')
-    speaker_ids = [i.strip().lstrip('#') for i in who_attr.split() if i.strip()]
+    speaker_ids = sp_speakers(sp)
     if not speaker_ids:
-        return
+        return 0
 
+    n_tokens = 0
     elems = sp.findall('.//tei:p', NS) or sp.findall('.//tei:l', NS)
     for elem in elems:
-        txt = extract_text_without_stage(elem).strip()
+        with stage(stats, 'text'):
+            txt, tokens = extract_text_without_stage(elem, count_tokens=True)
+        txt = txt.strip()
         if txt:
+            n_tokens += tokens
             for sid in speaker_ids:
                 speeches.setdefault(sid, []).append(txt)
+                if token_counts is not None:
+                    token_counts[sid] = token_counts.get(sid, 0) + tokens
+    return n_tokens
 
 
 def extract_title(root, NS):
@@ -90,37 +88,72 @@ def extract_title(root, NS):
     return 'UnknownTitle'
 
 
-def process_file(file_path, output_folder):
+def extract_file(file_path, stats=None, network=None):
     """
-    Processes a TEI XML file and writes each character's full speech to separate TXT files.
-    File naming: GenderAbbr_Title_SpeakerName.txt
+    Extracts each character's full speech from a TEI XML file without writing anything.
+    :param file_path: Path of the TEI XML file.
+    :param stats: Optional ExtractionStats for per-stage timings and counters.
+    :param network: Optional InteractionNetwork that records who speaks in which scene.
+    :return: A list of speech records (dicts with play, speaker_id, speaker_name,
+             gender, segment, text, tokens and file_name), one per character.
     """
     NS = {'tei': 'http://www.tei-c.org/ns/1.0'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-
-    name_map, sex_map = build_person_mappings(root, NS)
+    name_map, sex_map = {}, {}
+    title = 'UnknownTitle'
     # Map gender to abbreviation
     abbr_map = {'Male': 'M', 'Female': 'F'}
 
-    # Extract title of the piece
-    title = sanitize_filename(extract_title(root, NS))
-
     speeches = {}
-
-    # Collect all speeches
-    for sp in root.findall('.//tei:sp', NS):
-        process_sp(sp, name_map, speeches, NS)
-
-    os.makedirs(output_folder, exist_ok=True)
+    token_counts = {}
+
+    # Single pass: the header (cast list, title) is complete before the first <sp>
+    stream = TeiStream(file_path)
+    with stage(stats, 'stream'):
+        for event, elem, context in stream:
+            if event == 'header':
+                with stage(stats, 'person_mappings'):
+                    name_map, sex_map = build_person_mappings(elem, NS)
+                    title = extract_title(elem, NS)
+                if network is not None:
+                    network.set_people(play_id(file_path), name_map, sex_map)
+            else:
+                with stage(stats, 'process_sp'):
+                    n_tokens = process_sp(elem, name_map, speeches, NS, token_counts, stats)
+                if stats is not None:
+                    stats.count('sp')
+                if network is not None:
+                    network.add_speech(play_id(file_path), sp_speakers(elem), context, n_tokens)
+
+    # Title of the piece as used in file names
+    title = sanitize_filename(title)
+
+    records = []
     for sid, texts in speeches.items():
-        speaker_name = sanitize_filename(name_map.get(sid, sid))
+        speaker_name = name_map.get(sid, sid)
         gender_full = sex_map.get(sid, 'Unknown')
         gender_abbr = abbr_map.get(gender_full, 'U')
-        file_name = f"{gender_abbr}_{title}_{speaker_name}.txt"
-        output_path = os.path.join(output_folder, file_name)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(texts))
+        text = '\n\n'.join(texts)
+        records.append({
+            'play': play_id(file_path),
+            'speaker_id': sid,
+            'speaker_name': speaker_name,
+            'gender': gender_abbr,
+            'segment': '',
+            'text': text,
+            'tokens': token_counts.get(sid, 0),
+            'file_name': f"{gender_abbr}_{title}_{sanitize_filename(speaker_name)}.txt",
+        })
+    if stats is not None:
+        stats.finish_extraction(stream, records)
+    return records
+
+
+def process_file(file_path, output_folder, stats=None):
+    """
+    Processes a TEI XML file and writes each character's full speech to separate TXT files.
+    File naming: GenderAbbr_Title_SpeakerName.txt
+    """
+    write_speeches(extract_file(file_path, stats), output_folder, stats)
     print(f"Processed: {file_path}\nResults saved in: {output_folder}")
 
 
@@ -129,9 +162,9 @@ def main():
     input_folder = r"E:\python\input"
     output_folder = r"E:\python\output"
 
-    for fname in os.listdir(input_folder):
-        if fname.lower().endswith('.xml'):
-            process_file(os.path.join(input_folder, fname), output_folder)
+    # Unchanged files are skipped via the extraction cache in the output folder
+    from batch_extract import run_batch
+    run_batch(input_folder, output_folder, mode='full', workers=1)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
-import os
-import xml.etree.ElementTree as ET
+from instrumentation import stage
+from speech_output import write_speeches
+from tei_stream import TeiStream, extract_text_without_stage, play_id, sp_speakers
 
 def convert_ordinal(ordinal_str):
     """
@@ -15,19 +16,6 @@ def convert_ordinal(ordinal_str):
     return mapping.get(token, token)
 
 
-def extract_text_without_stage(elem):
-    """
-    Recursively extracts the text of an element, ignoring content from <stage> and <speaker> elements.
-    """
-    text = elem.text or ""
-    for child in elem:
-        if not (child.tag.endswith('stage') or child.tag.endswith('speaker')):
-            text += extract_text_without_stage(child)
-        if child.tail:
-            text += child.tail
-    return text
-
-
 def build_person_mappings(root, NS):
     """
     Creates mappings from character IDs to full names and to abbreviated gender labels (M, F, U).
@@ -58,65 +46,113 @@ def build_person_mappings(root, NS):
     return name_map, sex_map
 
 
-def process_sp(sp, grouping_key, speeches, NS):
+def process_sp(sp, grouping_key, speeches, NS, token_counts=None, stats=None):
     """
     Extracts the speech text from a <sp> block and adds it to all corresponding speaker entries.
-    grouping_key is the act or scene number used in naming the file.
+    grouping_key is the act or scene (number or SpeechContext) the speech belongs to.
+    If token_counts is given, whitespace token counts are accumulated per entry as well;
+    stats (ExtractionStats) receives the time spent in extract_text_without_stage.
+    :return: The number of whitespace tokens of the speech.
     """
-    who_attr = sp.get('who', '')
-    speaker_ids = [i.strip().lstrip('#') for i in who_attr.split() if i.strip()]
+    speaker_ids = sp_speakers(sp)
     if not speaker_ids:
-        return
+        return 0
 
     texts = []
+    n_tokens = 0
     elems = sp.findall('.//tei:p', NS) or sp.findall('.//tei:l', NS)
     for elem in elems:
-        txt = extract_text_without_stage(elem).strip()
+        with stage(stats, 'text'):
+            txt, tokens = extract_text_without_stage(elem, count_tokens=True)
+        txt = txt.strip()
         if txt:
             texts.append(txt)
+            n_tokens += tokens
     if not texts:
-        return
+        return 0
     full_text = '\n'.join(texts)
 
     for sid in speaker_ids:
         key = (sid, grouping_key)
         speeches.setdefault(key, []).append(full_text)
+        if token_counts is not None:
+            token_counts[key] = token_counts.get(key, 0) + n_tokens
+    return n_tokens
 
 
-def process_file(file_path, output_folder):
+def extract_file(file_path, stats=None, network=None):
     """
-    Processes a TEI XML file and writes each character's speech to separate TXT files.
-    File naming: {GenderAbbr}_{Name}_{ActOrScene}.txt
+    Extracts each character's speech per act (or per scene for one-act plays)
+    from a TEI XML file without writing anything.
+    :param file_path: Path of the TEI XML file.
+    :param stats: Optional ExtractionStats for per-stage timings and counters.
+    :param network: Optional InteractionNetwork that records who speaks in which scene.
+    :return: A list of speech records (dicts with play, speaker_id, speaker_name,
+             gender, segment, text, tokens and file_name), one per character and act/scene.
     """
     NS = {'tei': 'http://www.tei-c.org/ns/1.0'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+    name_map, sex_map = {}, {}
+    by_context = {}
+    context_tokens = {}
+
+    # Single pass: speeches are collected per act/scene context first, since
+    # whether to group by act or by scene is only known once all acts are counted.
+    stream = TeiStream(file_path)
+    with stage(stats, 'stream'):
+        for event, elem, context in stream:
+            if event == 'header':
+                with stage(stats, 'person_mappings'):
+                    name_map, sex_map = build_person_mappings(elem, NS)
+                if network is not None:
+                    network.set_people(play_id(file_path), name_map, sex_map)
+            elif context.act_index:
+                with stage(stats, 'process_sp'):
+                    n_tokens = process_sp(elem, context, by_context, NS, context_tokens, stats)
+                if stats is not None:
+                    stats.count('sp')
+                if network is not None:
+                    network.add_speech(play_id(file_path), sp_speakers(elem), context, n_tokens)
 
-    name_map, sex_map = build_person_mappings(root, NS)
     speeches = {}
-
-    acts = root.findall('.//tei:div[@type="act"]', NS)
-    if len(acts) == 1:
-        for scene in acts[0].findall('.//tei:div[@type="scene"]', NS):
-            head = scene.find('tei:head', NS)
-            key = convert_ordinal(head.text) if head is not None and head.text else 'Unknown'
-            for sp in scene.findall('.//tei:sp', NS):
-                process_sp(sp, key, speeches, NS)
-    else:
-        for act in acts:
-            head = act.find('tei:head', NS)
-            key = convert_ordinal(head.text) if head is not None and head.text else 'Unknown'
-            for sp in act.findall('.//tei:sp', NS):
-                process_sp(sp, key, speeches, NS)
-
-    os.makedirs(output_folder, exist_ok=True)
+    token_counts = {}
+    single_act = stream.act_count == 1
+    for (sid, context), texts in by_context.items():
+        if single_act:
+            if not context.scene_index:
+                continue
+            head = context.scene_head
+        else:
+            head = context.act_head
+        key = convert_ordinal(head) if head else 'Unknown'
+        speeches.setdefault((sid, key), []).extend(texts)
+        token_counts[(sid, key)] = token_counts.get((sid, key), 0) + context_tokens[(sid, context)]
+
+    records = []
     for (sid, group_key), texts in speeches.items():
         speaker_name = name_map.get(sid, sid)
         gender_abbr = sex_map.get(sid, 'U')
-        file_name = f"{gender_abbr}_{speaker_name}_{group_key}.txt"
-        output_path = os.path.join(output_folder, file_name)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(texts))
+        text = '\n\n'.join(texts)
+        records.append({
+            'play': play_id(file_path),
+            'speaker_id': sid,
+            'speaker_name': speaker_name,
+            'gender': gender_abbr,
+            'segment': group_key,
+            'text': text,
+            'tokens': token_counts[(sid, group_key)],
+            'file_name': f"{gender_abbr}_{speaker_name}_{group_key}.txt",
+        })
+    if stats is not None:
+        stats.finish_extraction(stream, records)
+    return records
+
+
+def process_file(file_path, output_folder, stats=None):
+    """
+    Processes a TEI XML file and writes each character's speech to separate TXT files.
+    File naming: {GenderAbbr}_{Name}_{ActOrScene}.txt
+    """
+    write_speeches(extract_file(file_path, stats), output_folder, stats)
     print(f"Processed: {file_path}\nResults saved in: {output_folder}")
 
 
@@ -125,9 +161,9 @@ def main():
     input_folder = r"E:\python\input"
     output_folder = r"E:\python\output"
 
-    for fname in os.listdir(input_folder):
-        if fname.lower().endswith('.xml'):
-            process_file(os.path.join(input_folder, fname), output_folder)
+    # Unchanged files are skipped via the extraction cache in the output folder
+    from batch_extract import run_batch
+    run_batch(input_folder, output_folder, mode='segmented', workers=1)
 
 if __name__ == '__main__':
     main()
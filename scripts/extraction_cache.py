@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+# Bump when the extractors' output changes, so every play is re-extracted once.
+CACHE_VERSION = 1
+CACHE_FILE_NAME = '.extraction-cache.json'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    On-disk record of which XML file content produced which speech files,
+    kept per extractor mode ('full' or 'segmented') in the output folder.
+    Each entry holds the content hash, the target folder, the speech records
+    (without text) and the written paths of one play.
+    """
+
+    def __init__(self, output_folder, mode):
+        self.path = os.path.join(output_folder, CACHE_FILE_NAME)
+        self.mode = mode
+        self.data = {'version': CACHE_VERSION, 'modes': {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.data = data
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable cache {self.path}: {e}")
+        self.entries = self.data['modes'].setdefault(mode, {})
+        self.stale_paths = set()
+
+    def lookup(self, play, content_hash, target_folder):
+        """
+        Returns the cached entry of a play if its XML content and target folder
+        are unchanged and all of its output files still exist, else None.
+        """
+        entry = self.entries.get(play)
+        if (entry is None or entry['hash'] != content_hash
+                or entry['folder'] != os.path.abspath(target_folder)):
+            return None
+        if not all(os.path.exists(path) for path in entry['paths']):
+            return None
+        return entry
+
+    def update(self, play, content_hash, target_folder, records, paths):
+        """
+        Stores the new outputs of a re-extracted play and remembers its
+        previous outputs for cleanup.
+        """
+        previous = self.entries.get(play)
+        if previous is not None:
+            self.stale_paths.update(previous['paths'])
+        self.entries[play] = {
+            'hash': content_hash,
+            'folder': os.path.abspath(target_folder),
+            'records': [{k: v for k, v in record.items() if k != 'text'} for record in records],
+            'paths': list(paths),
+        }
+
+    def retain(self, plays):
+        """
+        Drops the entries of plays whose XML file no longer exists and
+        remembers their outputs for cleanup.
+        """
+        for play in list(self.entries):
+            if play not in plays:
+                self.stale_paths.update(self.entries.pop(play)['paths'])
+
+    def remove_stale_outputs(self):
+        """
+        Deletes outputs of removed speakers and plays that no current entry
+        (in any mode) still points to.
+        :return: The list of deleted paths.
+        """
+        current = {path for entries in self.data['modes'].values()
+                   for entry in entries.values() for path in entry['paths']}
+        removed = []
+        for path in sorted(self.stale_paths - current):
+            if os.path.exists(path):
+                os.remove(path)
+                removed.append(path)
+        self.stale_paths = set()
+        return removed
+
+    def save(self):
+        """
+        Writes the cache atomically next to the outputs.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
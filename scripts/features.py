@@ -0,0 +1,124 @@
+import re
+import zlib
+
+import numpy as np
+from scipy import sparse
+
+from stylometry import join_speech, table_from_counts, tokenize
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def word_ngrams(tokens, n):
+    """
+    Yields the word n-grams of a token list as space-joined strings.
+    """
+    if n == 1:
+        yield from tokens
+        return
+    for i in range(len(tokens) - n + 1):
+        yield ' '.join(tokens[i:i + n])
+
+
+def char_ngrams(text, n):
+    """
+    Yields the character n-grams of a lowercased text with whitespace runs
+    collapsed to single spaces (n-grams span word boundaries, as in stylo).
+    """
+    text = WHITESPACE.sub(' ', text.lower()).strip()
+    for i in range(len(text) - n + 1):
+        yield text[i:i + n]
+
+
+class NgramVectorizer:
+    """
+    Turns speeches into a sparse text x feature count matrix of word or character
+    n-grams (stylo's analyzed.features = "w"/"c" with ngram.size).
+
+    Feature IDs are assigned by a vocabulary that persists across calls, so
+    several plays can share one feature space. With n_features set, the hashing
+    trick is used instead: every n-gram is mapped to one of n_features columns
+    by CRC32, which bounds memory and needs no vocabulary at all.
+    :param analyzer: 'word' or 'char'.
+    :param ngram_range: (min n, max n), e.g. (3, 5) for character 3-5-grams.
+    """
+
+    def __init__(self, analyzer='word', ngram_range=(1, 1), n_features=None):
+        if analyzer not in ('word', 'char'):
+            raise ValueError(f"Unknown analyzer: {analyzer}")
+        self.analyzer = analyzer
+        self.ngram_range = ngram_range
+        self.n_features = n_features
+        self.vocabulary = {}
+
+    def ngrams(self, text):
+        """
+        Yields all n-grams of a text for the configured analyzer and range,
+        without building the list of n-gram strings.
+        """
+        tokens = tokenize(text) if self.analyzer == 'word' else None
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            yield from word_ngrams(tokens, n) if tokens is not None else char_ngrams(text, n)
+
+    def feature_ids(self, grams):
+        """
+        Maps n-grams to column IDs (vocabulary lookup or hashing).
+        """
+        if self.n_features:
+            n_features = self.n_features
+            return np.fromiter((zlib.crc32(g.encode('utf-8')) % n_features for g in grams), dtype=np.int64)
+        vocabulary = self.vocabulary
+        return np.fromiter((vocabulary.setdefault(g, len(vocabulary)) for g in grams), dtype=np.int64)
+
+    def transform(self, speeches):
+        """
+        Counts the n-grams of a speech dict ({label: text or fragments}). Each
+        speech is counted on its own and appended to the CSR arrays, so memory
+        grows with the number of distinct features per speech, not with the
+        number of n-grams in the corpus.
+        Without hashing, the matrix has one column per vocabulary entry at the
+        end of the call; matrices of earlier calls are narrower, but their
+        columns are a prefix of later ones (see pad).
+        :return: (labels, sparse CSR count matrix with one row per label).
+        """
+        labels = list(speeches)
+        indptr = [0]
+        indices = []
+        data = []
+        for label in labels:
+            columns, counts = np.unique(self.feature_ids(self.ngrams(join_speech(speeches[label]))),
+                                        return_counts=True)
+            indices.append(columns)
+            data.append(counts.astype(np.float64))
+            indptr.append(indptr[-1] + len(columns))
+        n_cols = self.n_features or len(self.vocabulary)
+        counts = sparse.csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0),
+             np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(labels), n_cols)
+        )
+        return labels, counts
+
+    def pad(self, counts):
+        """
+        Widens a count matrix of an earlier transform call to the current
+        vocabulary, so matrices of several calls can be stacked.
+        """
+        n_cols = self.n_features or len(self.vocabulary)
+        return sparse.csr_matrix((counts.data, counts.indices, counts.indptr), shape=(counts.shape[0], n_cols))
+
+    def feature_names(self):
+        """
+        Returns {feature: column ID}; hashed columns are named '#<column>'.
+        """
+        if self.n_features:
+            return {f'#{i}': i for i in range(self.n_features)}
+        return self.vocabulary
+
+    def frequency_table(self, speeches, mfw_list_cutoff=5000):
+        """
+        Returns a FrequencyTable of the most frequent n-grams, ready for the Delta functions.
+        """
+        labels, counts = self.transform(speeches)
+        return table_from_counts(labels, self.feature_names(), counts, mfw_list_cutoff)
@@ -0,0 +1,101 @@
+import contextlib
+import cProfile
+import csv
+import json
+import os
+import time
+
+
+class ExtractionStats:
+    """
+    Wall time per pipeline stage (seconds) and counters for one play.
+    Stages: total (extraction of the play), stream (the single TeiStream pass),
+    person_mappings, process_sp (including text), text (extract_text_without_stage),
+    parse (XML parsing, i.e. stream minus the time spent handling header and
+    speeches) and write.
+    Counters: elements, sp (<sp> elements handled), speeches (records), tokens,
+    files_written, bytes_written.
+    """
+
+    def __init__(self, play, mode):
+        self.play = play
+        self.mode = mode
+        self.timings = {}
+        self.counts = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def finish_extraction(self, stream, records):
+        """
+        Records the counters of a finished TeiStream and derives the parse time.
+        """
+        self.count('elements', stream.element_count)
+        self.count('speeches', len(records))
+        self.count('tokens', sum(record['tokens'] for record in records))
+        handled = self.timings.get('person_mappings', 0.0) + self.timings.get('process_sp', 0.0)
+        self.timings['parse'] = max(self.timings.get('stream', 0.0) - handled, 0.0)
+
+    def as_dict(self):
+        row = {'play': self.play, 'mode': self.mode}
+        row.update({f'{name}_s': round(seconds, 6) for name, seconds in self.timings.items()})
+        row.update(self.counts)
+        return row
+
+    @classmethod
+    def from_dict(cls, row):
+        stats = cls(row['play'], row['mode'])
+        for key, value in row.items():
+            if key.endswith('_s'):
+                stats.timings[key[:-2]] = value
+            elif key not in ('play', 'mode'):
+                stats.counts[key] = value
+        return stats
+
+
+def stage(stats, name):
+    """
+    Times a stage on stats, or does nothing if stats is None (instrumentation off).
+    """
+    return stats.stage(name) if stats is not None else contextlib.nullcontext()
+
+
+def profiled(profile_path, fn, *args, **kwargs):
+    """
+    Runs fn under cProfile and dumps the statistics to profile_path
+    (readable with pstats or snakeviz).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(profile_path)), exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+
+
+def write_report(path, rows):
+    """
+    Writes per-play statistics (ExtractionStats.as_dict rows) as JSON or,
+    for paths ending in .csv, as CSV.
+    """
+    if path.lower().endswith('.csv'):
+        fields = []
+        for row in rows:
+            fields.extend(key for key in row if key not in fields)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,141 @@
+import csv
+
+import numpy as np
+from scipy import sparse
+
+from edges import add_edge, write_edges_csv
+
+GENDER_ABBREVIATIONS = {'male': 'M', 'female': 'F', 'm': 'M', 'f': 'F'}
+NODE_FIELDS = ['Id', 'Label', 'Play', 'Gender', 'Words', 'Scenes']
+
+
+class InteractionNetwork:
+    """
+    Speaker x scene incidence of one or more plays, recorded during extraction.
+    Scenes are the (act, scene) positions of the SpeechContext, so plays without
+    scene divs count each act as one scene. Every <sp> adds its word count to
+    the cells of its speakers; consecutive speeches in the same scene by
+    different speakers are counted as replies. Node IDs are <play>_<speaker ID>.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.scenes = {}
+        self.cells = {}
+        self.replies = {}
+        self._last = None
+
+    def set_people(self, play, name_map, sex_map):
+        """
+        Registers the cast of a play (from build_person_mappings) for node labels and gender.
+        """
+        for sid, name in name_map.items():
+            self._node(play, sid)['Label'] = name
+        for sid, sex in sex_map.items():
+            self._node(play, sid)['Gender'] = GENDER_ABBREVIATIONS.get(sex.lower(), 'U')
+
+    def _node(self, play, sid):
+        node_id = f"{play}_{sid}"
+        if node_id not in self.nodes:
+            self.nodes[node_id] = {'Id': node_id, 'Label': sid, 'Play': play, 'Gender': 'U'}
+        return self.nodes[node_id]
+
+    def add_speech(self, play, speaker_ids, context, words):
+        """
+        Records one <sp> of a play: its speaker IDs, SpeechContext and word count.
+        """
+        if not speaker_ids:
+            return
+        scene = (play, context.act_index, context.scene_index)
+        scene_index = self.scenes.setdefault(scene, len(self.scenes))
+        node_ids = [self._node(play, sid)['Id'] for sid in speaker_ids]
+        for node_id in node_ids:
+            cell = (node_id, scene_index)
+            self.cells[cell] = self.cells.get(cell, 0) + words
+
+        if self._last is not None and self._last[0] == scene_index:
+            for source in self._last[1]:
+                for target in node_ids:
+                    if source != target:
+                        self.replies[(source, target)] = self.replies.get((source, target), 0) + 1
+        self._last = (scene_index, node_ids)
+
+    def merge(self, other):
+        """
+        Adds the recordings of another network (e.g. of a play extracted in a worker process).
+        """
+        offset = {}
+        for scene, index in other.scenes.items():
+            offset[index] = self.scenes.setdefault(scene, len(self.scenes))
+        for node_id, node in other.nodes.items():
+            self.nodes.setdefault(node_id, dict(node))
+        for (node_id, index), words in other.cells.items():
+            cell = (node_id, offset[index])
+            self.cells[cell] = self.cells.get(cell, 0) + words
+        for pair, count in other.replies.items():
+            self.replies[pair] = self.replies.get(pair, 0) + count
+        self._last = None
+
+    def incidence(self):
+        """
+        Returns (node IDs, sparse speaker x scene matrix of word counts).
+        Only speakers with at least one speech are included.
+        """
+        node_ids = sorted({node_id for node_id, _ in self.cells})
+        row_of = {node_id: i for i, node_id in enumerate(node_ids)}
+        rows = [row_of[node_id] for node_id, _ in self.cells]
+        cols = [index for _, index in self.cells]
+        matrix = sparse.coo_matrix(
+            (np.fromiter(self.cells.values(), dtype=np.float64, count=len(self.cells)), (rows, cols)),
+            shape=(len(node_ids), len(self.scenes))
+        ).tocsr()
+        return node_ids, matrix
+
+    def copresence_edges(self):
+        """
+        Returns {(source, target): number of shared scenes} for all speakers
+        appearing in the same scene (undirected).
+        """
+        node_ids, matrix = self.incidence()
+        present = (matrix > 0).astype(np.int64)
+        shared = sparse.triu(present @ present.T, k=1).tocoo()
+        edges = {}
+        for i, j, count in zip(shared.row, shared.col, shared.data):
+            add_edge(edges, node_ids[i], node_ids[j], int(count))
+        return edges
+
+    def reply_edges(self):
+        """
+        Returns {(source, target): number of replies}, directed from the speaker
+        answered to the speaker answering.
+        """
+        return dict(self.replies)
+
+    def write(self, prefix):
+        """
+        Writes <prefix>_Copresence_EDGES.csv, <prefix>_Replies_EDGES.csv (stylo's
+        Source,Target,Weight,Type plus the speakers' genders) and <prefix>_NODES.csv.
+        :return: The list of written paths.
+        """
+        node_ids, matrix = self.incidence()
+        words = np.asarray(matrix.sum(axis=1)).ravel()
+        scenes = matrix.getnnz(axis=1)
+        paths = []
+        for name, edges, edge_type in (('Copresence', self.copresence_edges(), 'undirected'),
+                                       ('Replies', self.reply_edges(), 'directed')):
+            genders = {
+                'Source_Gender': {pair: self.nodes[pair[0]]['Gender'] for pair in edges},
+                'Target_Gender': {pair: self.nodes[pair[1]]['Gender'] for pair in edges},
+            }
+            path = f"{prefix}_{name}_EDGES.csv"
+            write_edges_csv(path, edges, edge_type, genders)
+            paths.append(path)
+
+        path = f"{prefix}_NODES.csv"
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=NODE_FIELDS, lineterminator='\n')
+            writer.writeheader()
+            for node_id, n_words, n_scenes in zip(node_ids, words, scenes):
+                writer.writerow(dict(self.nodes[node_id], Words=int(n_words), Scenes=int(n_scenes)))
+        paths.append(path)
+        return paths
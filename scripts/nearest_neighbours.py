@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+
+from edges import neighbour_edges, write_edges_csv
+from stylometry import build_frequency_table, load_speech_folder
+
+
+def unit_rows(zscores):
+    """
+    Returns the z-scores as float32 rows of unit length (zero rows stay zero,
+    i.e. at cosine distance 1 from everything, as in cosine_distances).
+    """
+    rows = np.asarray(zscores, dtype=np.float32)
+    norms = np.linalg.norm(rows, axis=1)
+    norms[norms == 0] = 1.0
+    return rows / norms[:, None]
+
+
+def _merge_top_k(best_sim, best_idx, sim, idx, k):
+    """
+    Merges candidate similarities into the running top k per row, ordered by
+    descending similarity and ascending index for ties.
+    """
+    sim = np.concatenate([best_sim, sim], axis=1)
+    idx = np.concatenate([best_idx, idx], axis=1)
+    if sim.shape[1] > k:
+        keep = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        sim = np.take_along_axis(sim, keep, axis=1)
+        idx = np.take_along_axis(idx, keep, axis=1)
+    order = np.lexsort((idx, -sim), axis=1)
+    return np.take_along_axis(sim, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+def top_k_neighbours(zscores, k=3, block_size=1024):
+    """
+    Finds the k nearest texts of every text by Würzburg (cosine) Delta without
+    building the n x n distance matrix. Rows and columns are processed in
+    blocks with float32 matrix products, and only the running top k per row
+    is kept, so memory is O(n * k + block_size ** 2) besides the z-scores.
+    :return: (n x k neighbour indices, n x k cosine distances), nearest first.
+    """
+    unit = unit_rows(zscores)
+    n = unit.shape[0]
+    k = min(k, n - 1)
+    indices = np.zeros((n, max(k, 0)), dtype=np.int64)
+    distances = np.zeros((n, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, distances
+
+    for start in range(0, n, block_size):
+        rows = unit[start:start + block_size]
+        row_ids = np.arange(start, start + rows.shape[0])
+        best_sim = np.empty((rows.shape[0], 0), dtype=np.float32)
+        best_idx = np.empty((rows.shape[0], 0), dtype=np.int64)
+        for col_start in range(0, n, block_size):
+            sim = rows @ unit[col_start:col_start + block_size].T
+            col_ids = np.arange(col_start, col_start + sim.shape[1])
+            sim[row_ids[:, None] == col_ids[None, :]] = -np.inf
+            best_sim, best_idx = _merge_top_k(best_sim, best_idx, sim,
+                                              np.broadcast_to(col_ids, sim.shape), k)
+        indices[start:start + rows.shape[0]] = best_idx
+        distances[start:start + rows.shape[0]] = np.clip(1.0 - best_sim, 0.0, 2.0)
+    return indices, distances
+
+
+def nearest_neighbour_network(table, mfw_min=100, mfw_max=1000, mfw_incr=100, k=3,
+                              culling=0, block_size=1024):
+    """
+    Sums the top-k neighbour edges over an MFW sweep, like the EDGES files of
+    stylo's consensus networks, using Würzburg Delta.
+    :return: {(label, label): weight} network edges.
+    """
+    zscores = table.zscores(mfw_max, culling)
+    edges = {}
+    for mfw in range(mfw_min, zscores.shape[1] + 1, mfw_incr):
+        indices, _ = top_k_neighbours(zscores[:, :mfw], k, block_size)
+        for key, weight in neighbour_edges(indices, table.labels).items():
+            edges[key] = edges.get(key, 0) + weight
+    return edges
+
+
+def write_nearest_network(input_folder, output_folder, prefix, mfw_min=100, mfw_max=1000, mfw_incr=100, k=3):
+    """
+    Writes the top-k neighbour network (_EDGES.csv) for the speech TXT files of a folder.
+    """
+    table = build_frequency_table(load_speech_folder(input_folder))
+    edges = nearest_neighbour_network(table, mfw_min, mfw_max, mfw_incr, k)
+
+    os.makedirs(output_folder, exist_ok=True)
+    name = f"{prefix}_Nearest_{k}_{mfw_min}-{mfw_max}_MFWs_Culled_0__wurzburg_EDGES.csv"
+    write_edges_csv(os.path.join(output_folder, name), edges)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+    prefix = "all-works"
+
+    # Settings as in stylo_config.txt
+    mfw_min, mfw_max, mfw_incr = 100, 1000, 100
+    k = 3
+
+    write_nearest_network(input_folder, output_folder, prefix, mfw_min, mfw_max, mfw_incr, k)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+
+from stylometry import DISTANCE_MEASURES, build_frequency_table, eder_weights, load_speech_folder, tokenize
+
+
+class RollingDelta:
+    """
+    Delta distances of a sliding token window to reference profiles, e.g. how a
+    character's style moves through a play relative to the other speakers.
+
+    The window holds a fixed number of tokens, so its relative frequencies are
+    counts * 100 / window and adding or dropping a token changes a single
+    z-score by +-100 / (window * std). The running sums behind every measure
+    (sum of weighted absolute differences for Burrows's and Eder's Delta, dot
+    products and the squared norm for Würzburg Delta) are updated for that one
+    feature only, i.e. O(1) per step and reference instead of recounting the
+    window. The sums are recomputed every refresh steps to stop rounding drift.
+    """
+
+    def __init__(self, table, mfw=100, measure='wurzburg', culling=0, references=None, refresh=10000):
+        """
+        :param table: FrequencyTable providing the MFW list, the z-score
+                      statistics and the reference rows.
+        :param references: Labels of the table rows to compare with (default: all).
+        """
+        if measure not in DISTANCE_MEASURES:
+            raise ValueError(f"Unknown distance measure: {measure}")
+        columns = table.columns(mfw, culling)
+        freqs = table.freqs[:, columns]
+        self.mean = freqs.mean(axis=0)
+        std = freqs.std(axis=0, ddof=1) if freqs.shape[0] > 1 else np.zeros(freqs.shape[1])
+        std[std == 0] = 1.0
+        self.std = std
+        self.words = list(np.asarray(table.words, dtype=object)[columns])
+        self.column_of = {word: j for j, word in enumerate(self.words)}
+        self.measure = measure
+        self.refresh = refresh
+
+        self.labels = list(references) if references is not None else list(table.labels)
+        rows = [table.labels.index(label) for label in self.labels]
+        # References are z-scored with the statistics of the table, as in zscores()
+        self.ref = ((freqs[rows] - self.mean) / self.std).T.copy()
+        n = len(self.words)
+        self.weights = eder_weights(n) if measure == 'eder' else np.ones(n)
+        self.ref_norms = np.sqrt((self.ref ** 2).sum(axis=0))
+        self.ref_norms[self.ref_norms == 0] = 1.0
+
+    def columns_of(self, text):
+        """
+        Tokenizes a text and maps every token to its MFW column (-1 for other words).
+        """
+        return np.array([self.column_of.get(token, -1) for token in tokenize(text)], dtype=np.int64)
+
+    def _distances(self, abs_sum, dots, sq_norm):
+        if self.measure == 'wurzburg':
+            norm = np.sqrt(sq_norm) or 1.0
+            return np.clip(1.0 - dots / (norm * self.ref_norms), 0.0, 2.0)
+        return abs_sum / len(self.words)
+
+    def _sums(self, z):
+        diff = np.abs(z[:, None] - self.ref) * self.weights[:, None]
+        return diff.sum(axis=0), z @ self.ref, float(z @ z)
+
+    def curve(self, text, window=1000, step=100):
+        """
+        Slides a window of window tokens over a text one token at a time.
+        :param step: Record the distances every step tokens.
+        :return: (end positions of the recorded windows in tokens,
+                  positions x references distance array); empty if the text is
+                  shorter than the window.
+        """
+        cols = self.columns_of(text)
+        if len(cols) < window:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(self.labels)))
+
+        counts = np.bincount(cols[:window][cols[:window] >= 0], minlength=len(self.words)).astype(np.float64)
+        scale = 100.0 / window
+        z = (counts * scale - self.mean) / self.std
+        abs_sum, dots, sq_norm = self._sums(z)
+        delta = scale / self.std
+
+        positions = []
+        curves = []
+        for end in range(window, len(cols) + 1):
+            if end > window:
+                for j, sign in ((cols[end - 1], 1.0), (cols[end - window - 1], -1.0)):
+                    if j < 0:
+                        continue
+                    old = z[j]
+                    z[j] = old + sign * delta[j]
+                    ref = self.ref[j]
+                    abs_sum += (np.abs(z[j] - ref) - np.abs(old - ref)) * self.weights[j]
+                    dots += (z[j] - old) * ref
+                    sq_norm += z[j] ** 2 - old ** 2
+                if (end - window) % self.refresh == 0:
+                    abs_sum, dots, sq_norm = self._sums(z)
+            if (end - window) % step == 0:
+                positions.append(end)
+                curves.append(self._distances(abs_sum, dots, sq_norm))
+        return np.asarray(positions, dtype=np.int64), np.asarray(curves)
+
+
+def write_curve(path, labels, positions, distances):
+    """
+    Writes a rolling curve as CSV: window end position and one column per reference.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('"Position",' + ','.join(f'"{label}"' for label in labels) + '\n')
+        for position, row in zip(positions, distances):
+            f.write(f'{position},' + ','.join(f'{d:.6f}' for d in row) + '\n')
+
+
+def write_rolling_curves(input_folder, output_folder, mfw=100, measure='wurzburg', window=1000, step=100,
+                         label_prefix='F_'):
+    """
+    Writes a rolling curve for every speech TXT file of a folder whose name
+    starts with label_prefix (default: female speakers), against all speakers.
+    """
+    speeches = load_speech_folder(input_folder)
+    rolling = RollingDelta(build_frequency_table(speeches), mfw, measure)
+    os.makedirs(output_folder, exist_ok=True)
+    for label, text in speeches.items():
+        if not label.startswith(label_prefix):
+            continue
+        positions, distances = rolling.curve(text, window, step)
+        if len(positions):
+            output_path = os.path.join(output_folder, f"rolling_{label}_{window}_{mfw}_MFWs_{measure}.csv")
+            write_curve(output_path, rolling.labels, positions, distances)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+
+    # Window settings: curves for every female speaker (files starting with F_)
+    mfw = 100
+    measure = 'wurzburg'
+    window, step = 1000, 100
+
+    write_rolling_curves(input_folder, output_folder, mfw, measure, window, step)
+
+
+if __name__ == '__main__':
+    main()
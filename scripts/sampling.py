@@ -0,0 +1,84 @@
+import numpy as np
+from scipy import sparse
+
+from stylometry import encode_speeches, table_from_counts
+
+SAMPLING_MODES = ('normal', 'random', 'windowed')
+
+
+class SpeechSampler:
+    """
+    Reproducible sampling of speeches as in stylo's sampling options
+    (sampling, sample.size, number.of.samples), working on token-ID arrays
+    that are tokenized once.
+
+    'normal'   consecutive, non-overlapping chunks of sample_size tokens
+               (the remainder is dropped, as in stylo's normal.sampling);
+    'random'   number_of_samples bags of sample_size tokens drawn with
+               replacement (bootstrap), usable for any non-empty speech;
+    'windowed' number_of_samples consecutive windows at random offsets.
+
+    Each speaker gets its own generator spawned from seed, so the samples of a
+    speaker do not depend on how many samples are drawn for the others.
+    """
+
+    def __init__(self, speeches, seed=0, vocabulary=None):
+        self.labels, self.encoded, self.vocabulary = encode_speeches(speeches, vocabulary)
+        self.seed = seed
+
+    def sample_indices(self, i, mode, sample_size, number_of_samples=1):
+        """
+        Returns a (samples x sample_size) array of token positions in speech i
+        (possibly with zero rows if the speech is too short for the mode).
+        """
+        n = len(self.encoded[i])
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(i,)))
+        if mode == 'normal':
+            chunks = n // sample_size
+            return np.arange(chunks * sample_size).reshape(chunks, sample_size)
+        if mode == 'random':
+            if n == 0:
+                return np.zeros((0, sample_size), dtype=np.int64)
+            return rng.integers(0, n, size=(number_of_samples, sample_size))
+        if mode == 'windowed':
+            if n < sample_size:
+                return np.zeros((0, sample_size), dtype=np.int64)
+            starts = rng.integers(0, n - sample_size + 1, size=number_of_samples)
+            return starts[:, None] + np.arange(sample_size)
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+    def sample_counts(self, mode='random', sample_size=1000, number_of_samples=10):
+        """
+        Draws the samples of all speakers and counts their tokens in one sparse matrix.
+        :return: (sample labels, sparse samples x vocabulary counts, index of the source speaker per sample).
+        """
+        labels = []
+        sources = []
+        rows = []
+        cols = []
+        for i, label in enumerate(self.labels):
+            idx = self.sample_indices(i, mode, sample_size, number_of_samples)
+            if not len(idx):
+                continue
+            first = len(labels)
+            labels.extend(f"{label}_{k + 1}" for k in range(len(idx)))
+            sources.extend([i] * len(idx))
+            rows.append(np.repeat(np.arange(first, first + len(idx)), sample_size))
+            cols.append(self.encoded[i][idx].ravel())
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32)
+        counts = sparse.coo_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(labels), len(self.vocabulary))
+        ).tocsr()
+        return labels, counts, np.asarray(sources, dtype=np.int64)
+
+    def frequency_table(self, mode='random', sample_size=1000, number_of_samples=10, mfw_list_cutoff=5000):
+        """
+        Returns a FrequencyTable with one row per sample, ready for compute_delta / mfw_sweep.
+        The source speaker of each row is available as table.sources.
+        """
+        labels, counts, sources = self.sample_counts(mode, sample_size, number_of_samples)
+        table = table_from_counts(labels, self.vocabulary, counts, mfw_list_cutoff)
+        table.sources = sources
+        return table
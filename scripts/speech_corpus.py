@@ -0,0 +1,201 @@
+import os
+
+import numpy as np
+
+# Metadata columns with a value -> rows index (segment is the act/scene key
+# of segmented extraction and empty for full extraction).
+INDEXED_COLUMNS = ('play', 'speaker_id', 'gender', 'segment')
+RECORD_COLUMNS = ['play', 'speaker_id', 'speaker_name', 'gender', 'segment', 'tokens', 'file_name']
+
+
+class SpeechCorpus:
+    """
+    In-memory speech corpus for subcorpus queries. All texts live in one UTF-8
+    buffer with an int64 offsets array; the metadata columns are plain lists and
+    INDEXED_COLUMNS have a {value: sorted row indices} index, so a query such as
+    "all female speech in act 2" is a few index lookups instead of a walk over
+    the exported TXT files (whose names are ambiguous for names with underscores).
+    """
+
+    def __init__(self, columns, buffer, offsets):
+        """
+        Use from_records, from_store or from_files instead.
+        :param columns: {column: list of values}, one value per speech.
+        :param buffer: Concatenated UTF-8 texts (bytes or memoryview).
+        :param offsets: int64 array of count + 1 offsets into buffer.
+        """
+        self.columns = columns
+        self.buffer = memoryview(buffer)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.count = len(self.offsets) - 1
+        self.index = {}
+        for name in INDEXED_COLUMNS:
+            rows = {}
+            for i, value in enumerate(columns[name]):
+                rows.setdefault(value, []).append(i)
+            self.index[name] = {value: np.asarray(idx, dtype=np.int64) for value, idx in rows.items()}
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds the corpus from speech records as returned by the extractors' extract_file.
+        """
+        columns = {name: [record.get(name, '') for record in records] for name in RECORD_COLUMNS}
+        encoded = [record['text'].encode('utf-8') for record in records]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return cls(columns, b''.join(encoded), offsets)
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Builds the corpus on an open SpeechStore, sharing its memory-mapped text
+        buffer; the store must stay open while the corpus is used.
+        """
+        offsets = np.frombuffer(store.offsets, dtype='<i8') if isinstance(store.offsets, memoryview) \
+            else np.asarray(store.offsets, dtype=np.int64)
+        return cls(store.columns, store.buffer, offsets)
+
+    @classmethod
+    def from_files(cls, file_paths, mode='segmented', workers=None):
+        """
+        Extracts TEI files (in parallel, see batch_extract) and builds the corpus
+        from the records, without writing any speech files.
+        """
+        from batch_extract import extract_all
+
+        records = []
+        for _, play_records, _, _ in extract_all(file_paths, mode, workers):
+            records.extend(play_records)
+        return cls.from_records(records)
+
+    def __len__(self):
+        return self.count
+
+    def values(self, column):
+        """
+        Returns the sorted distinct values of an indexed column.
+        """
+        return sorted(self.index[column])
+
+    def select(self, **criteria):
+        """
+        Returns a SpeechView of the speeches matching all criteria, e.g.
+        select(gender='F', segment='2') or select(play=[...], gender=('F', 'M')).
+        Each criterion is an indexed column and a value or a list/tuple/set of values.
+        """
+        rows = np.arange(self.count, dtype=np.int64)
+        for column, value in criteria.items():
+            if column not in self.index:
+                raise ValueError(f"Not an indexed column: {column}")
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            index = self.index[column]
+            matches = [index[v] for v in values if v in index]
+            matches = np.unique(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int64)
+            rows = np.intersect1d(rows, matches, assume_unique=True)
+        return SpeechView(self, rows)
+
+    def all(self):
+        """
+        Returns a SpeechView of the whole corpus.
+        """
+        return SpeechView(self, np.arange(self.count, dtype=np.int64))
+
+    def text_bytes(self, i):
+        """
+        Returns the UTF-8 bytes of speech i as a zero-copy memoryview.
+        """
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    def text(self, i):
+        """
+        Returns the decoded text of speech i.
+        """
+        return str(self.text_bytes(i), 'utf-8')
+
+    def record(self, i):
+        """
+        Returns speech i as a record dict, like the extractors' extract_file.
+        """
+        record = {name: values[i] for name, values in self.columns.items()}
+        record['text'] = self.text(i)
+        return record
+
+
+class SpeechView:
+    """
+    A subset of a SpeechCorpus: only the row indices are stored, texts are
+    decoded or concatenated when asked for. Views can be narrowed further with
+    select and split with group_by.
+    """
+
+    def __init__(self, corpus, rows):
+        self.corpus = corpus
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        """
+        Yields the record dicts of the view.
+        """
+        for i in self.rows:
+            yield self.corpus.record(i)
+
+    def select(self, **criteria):
+        """
+        Narrows the view with the same criteria as SpeechCorpus.select.
+        """
+        narrowed = self.corpus.select(**criteria)
+        return SpeechView(self.corpus, np.intersect1d(self.rows, narrowed.rows, assume_unique=True))
+
+    def column(self, name):
+        """
+        Returns the values of a metadata column for the speeches in the view.
+        """
+        values = self.corpus.columns[name]
+        return [values[i] for i in self.rows]
+
+    def tokens(self):
+        """
+        Returns the total whitespace token count of the view.
+        """
+        return sum(self.column('tokens'))
+
+    def texts(self):
+        """
+        Yields the decoded texts of the view one by one.
+        """
+        for i in self.rows:
+            yield self.corpus.text(i)
+
+    def joined(self, sep='\n\n'):
+        """
+        Concatenates the texts of the view, joined like the fragments of one speaker's file.
+        """
+        return sep.join(self.texts())
+
+    def group_by(self, *columns):
+        """
+        Splits the view by metadata columns, e.g. group_by('gender') or
+        group_by('play', 'segment').
+        :return: {value (or tuple of values for several columns): SpeechView}.
+        """
+        keys = list(zip(*(self.column(name) for name in columns)))
+        groups = {}
+        for key, i in zip(keys, self.rows):
+            groups.setdefault(key if len(columns) > 1 else key[0], []).append(i)
+        return {key: SpeechView(self.corpus, np.asarray(idx, dtype=np.int64)) for key, idx in groups.items()}
+
+    def speeches(self):
+        """
+        Returns the view as a {label: text} dict for stylometry.build_frequency_table.
+        Labels are the file names without extension, as in load_speech_folder;
+        if these are not unique (segmented files of several plays), all labels
+        are prefixed with the play ID.
+        """
+        labels = [os.path.splitext(name)[0] for name in self.column('file_name')]
+        if len(set(labels)) < len(labels):
+            labels = [f"{play}_{label}" for play, label in zip(self.column('play'), labels)]
+        return dict(zip(labels, self.texts()))
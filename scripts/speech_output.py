@@ -0,0 +1,51 @@
+import csv
+import os
+
+from instrumentation import stage
+
+MANIFEST_FIELDS = ['play', 'speaker_id', 'speaker_name', 'gender', 'segment', 'tokens', 'output_path']
+
+
+def write_speeches(records, output_folder, stats=None):
+    """
+    Writes the speech records returned by the extractors' extract_file to TXT files.
+    :param stats: Optional ExtractionStats that receives write time, files and bytes written.
+    :return: The list of written paths, in the order of the records.
+    """
+    with stage(stats, 'write'):
+        os.makedirs(output_folder, exist_ok=True)
+        paths = []
+        written = 0
+        for record in records:
+            output_path = os.path.join(output_folder, record['file_name'])
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(record['text'])
+                written += f.tell()
+            paths.append(output_path)
+    if stats is not None:
+        stats.count('files_written', len(paths))
+        stats.count('bytes_written', written)
+    return paths
+
+
+def write_manifest(path, records, paths):
+    """
+    Writes one manifest row per speech record: play, speaker ID and name, gender,
+    act/scene segment, token count and the path of the written TXT file.
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for record, output_path in zip(records, paths):
+            writer.writerow(dict(record, output_path=output_path))
+
+
+def read_manifest(path):
+    """
+    Reads a manifest written by write_manifest into a list of dicts.
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row['tokens'] = int(row['tokens'])
+    return rows
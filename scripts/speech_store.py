@@ -0,0 +1,120 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b'SPSTORE1'
+# Metadata columns kept per speech; the text itself lives in the buffer.
+STORE_COLUMNS = ['play', 'speaker_id', 'speaker_name', 'gender', 'segment', 'tokens', 'file_name']
+
+
+def write_store(path, records):
+    """
+    Writes speech records (as returned by the extractors' extract_file) to a single
+    corpus file: one concatenated UTF-8 text buffer, an int64 offsets array and
+    the metadata columns. The file is written to a temporary name and moved into
+    place, so readers always see a complete snapshot.
+
+    Layout: MAGIC, uint64 header length, JSON header (count and columns),
+    padding to 8 bytes, (count + 1) little-endian int64 offsets, text buffer.
+    """
+    columns = {name: [record.get(name, '') for record in records] for name in STORE_COLUMNS}
+    header = json.dumps({'count': len(records), 'columns': columns}, ensure_ascii=False).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+    offsets = array('q', [0])
+    encoded = []
+    for record in records:
+        data = record['text'].encode('utf-8')
+        encoded.append(data)
+        offsets.append(offsets[-1] + len(data))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(offsets.tobytes())
+        for data in encoded:
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class SpeechStore:
+    """
+    Read-only, memory-mapped view of a corpus file written by write_store.
+    Texts are sliced from the mapped buffer without copying; metadata columns
+    are plain lists indexed like the speeches.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a speech store file: {path}")
+        (header_length,) = struct.unpack_from('<Q', view, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(view[start:start + header_length]).decode('utf-8'))
+        self.count = header['count']
+        self.columns = header['columns']
+
+        offsets_start = start + header_length
+        offsets_end = offsets_start + 8 * (self.count + 1)
+        if sys.byteorder == 'little':
+            self.offsets = view[offsets_start:offsets_end].cast('q')
+        else:
+            self.offsets = array('q', view[offsets_start:offsets_end])
+            self.offsets.byteswap()
+        self.buffer = view[offsets_end:]
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Releases the memory map. Views handed out before must not be used afterwards.
+        """
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.buffer.release()
+        self._mmap.close()
+
+    def text_bytes(self, i):
+        """
+        Returns the UTF-8 bytes of speech i as a zero-copy memoryview.
+        """
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    def text(self, i):
+        """
+        Returns the decoded text of speech i.
+        """
+        return str(self.text_bytes(i), 'utf-8')
+
+    def record(self, i):
+        """
+        Returns speech i as a record dict, like the extractors' extract_file.
+        """
+        record = {name: values[i] for name, values in self.columns.items()}
+        record['text'] = self.text(i)
+        return record
+
+    def rows(self, column, value):
+        """
+        Returns the indices of all speeches whose column equals value.
+        """
+        return [i for i, v in enumerate(self.columns[column]) if v == value]
@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import struct
+
+import numpy as np
+
+MAGIC = b'STYLOTB1'
+# MAGIC, then uint64 word and speaker counts, then the float32 matrix
+DATA_OFFSET = len(MAGIC) + 16
+# Quoted names in R's write.table output ("..." with \" escapes)
+QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def _unquote(name):
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def read_wordlist(path):
+    """
+    Reads a stylo wordlist.txt: one word per line, skipping blank lines and
+    comments (lines starting with #, including words marked as unwanted).
+    """
+    words = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith('#'):
+                words.append(word)
+    return words
+
+
+def _write_binary(path, speakers, rows):
+    """
+    Streams float32 rows (one per word) into the binary table format.
+    :param rows: Iterable of (word, row of len(speakers) frequencies).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    words = []
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<QQ', 0, len(speakers)))
+            for word, row in rows:
+                row = np.asarray(row, dtype='<f4')
+                if row.shape != (len(speakers),):
+                    raise ValueError(f"Row of '{word}' has {row.size} values for {len(speakers)} speakers")
+                f.write(row.tobytes())
+                words.append(word)
+            f.write(json.dumps({'speakers': list(speakers), 'words': words}, ensure_ascii=False).encode('utf-8'))
+            f.seek(len(MAGIC))
+            f.write(struct.pack('<Q', len(words)))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert_stylo_table(table_path, binary_path, wordlist_path=None):
+    """
+    Converts a stylo table_with_frequencies.txt (header of quoted speaker names,
+    then one quoted word and its frequencies per line) into the binary format
+    read by StyloTable. The text is parsed line by line, so only one row is held
+    in memory at a time.
+    :param wordlist_path: Optional wordlist.txt of the same run; the table's
+                          words must match it in order, else nothing is written.
+    """
+    expected = read_wordlist(wordlist_path) if wordlist_path else None
+
+    def rows(f):
+        count = 0
+        for line_number, line in enumerate(f, 2):
+            if not line.strip():
+                continue
+            match = QUOTED.match(line)
+            if match is None:
+                raise ValueError(f"{table_path}:{line_number}: expected a quoted word")
+            word = _unquote(match.group(1))
+            if expected is not None and (count >= len(expected) or expected[count] != word):
+                wanted = f"'{expected[count]}'" if count < len(expected) else 'end of list'
+                raise ValueError(f"{table_path}:{line_number}: '{word}' does not match "
+                                 f"{wordlist_path} (expected {wanted})")
+            count += 1
+            yield word, np.array(line[match.end():].split(), dtype=np.float32)
+        if expected is not None and count != len(expected):
+            raise ValueError(f"{table_path} has {count} words, {wordlist_path} has {len(expected)}")
+
+    with open(table_path, encoding='utf-8') as f:
+        speakers = [_unquote(name) for name in QUOTED.findall(f.readline())]
+        return _write_binary(binary_path, speakers, rows(f))
+
+
+def write_binary_table(path, labels, words, freqs):
+    """
+    Writes a speaker x word relative frequency matrix (e.g. FrequencyTable.freqs
+    with its labels and words) in the binary format.
+    """
+    freqs = np.asarray(freqs)
+    return _write_binary(path, labels, ((word, freqs[:, j]) for j, word in enumerate(words)))
+
+
+class StyloTable:
+    """
+    Memory-mapped binary frequency table. The float32 matrix is stored word by
+    word as in table_with_frequencies.txt, so the n most frequent words are the
+    first n rows of the file and mfw(n) is a view, not a copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a binary stylo table: {path}")
+            n_words, n_speakers = struct.unpack('<QQ', f.read(16))
+            f.seek(DATA_OFFSET + 4 * n_words * n_speakers)
+            index = json.loads(f.read().decode('utf-8'))
+        self.labels = index['speakers']
+        self.words = index['words']
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+        self.speaker_index = {label: i for i, label in enumerate(self.labels)}
+        if n_words:
+            self.table = np.memmap(path, dtype='<f4', mode='r', offset=DATA_OFFSET,
+                                   shape=(n_words, n_speakers))
+        else:
+            self.table = np.zeros((0, n_speakers), dtype='<f4')
+
+    @property
+    def freqs(self):
+        """
+        Speaker x word view of the relative frequencies (in percent), like FrequencyTable.freqs.
+        """
+        return self.table.T
+
+    def mfw(self, n):
+        """
+        Returns the speaker x word frequencies of the n most frequent words as a view.
+        """
+        return self.table[:n].T
+
+    def speaker(self, label):
+        """
+        Returns the frequencies of one speaker over all words (a strided view).
+        """
+        return self.table[:, self.speaker_index[label]]
+
+    def zscores(self, n=None):
+        """
+        Column-wise z-scores of the n most frequent words, computed as in
+        FrequencyTable.zscores (sample standard deviation, constant columns as 0).
+        """
+        freqs = np.asarray(self.mfw(n if n is not None else len(self.words)), dtype=np.float64)
+        mean = freqs.mean(axis=0)
+        std = freqs.std(axis=0, ddof=1) if freqs.shape[0] > 1 else np.zeros(freqs.shape[1])
+        std[std == 0] = 1.0
+        return (freqs - mean) / std
+
+
+def convert_stylo_runs(input_folder, output_folder):
+    """
+    Converts every archived stylo run (<input_folder>/files_*/table_with_frequencies.txt)
+    to <output_folder>/<run>.stylotable, checking it against the run's wordlist.txt if present.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    for run in sorted(os.listdir(input_folder)):
+        table_path = os.path.join(input_folder, run, 'table_with_frequencies.txt')
+        wordlist_path = os.path.join(input_folder, run, 'wordlist.txt')
+        if os.path.isfile(table_path):
+            convert_stylo_table(table_path, os.path.join(output_folder, f"{run}.stylotable"),
+                                wordlist_path if os.path.isfile(wordlist_path) else None)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\output_stylo"
+    output_folder = r"E:\python\output"
+
+    convert_stylo_runs(input_folder, output_folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+import os
+import re
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial.distance import cdist
+
+# Letter runs only, as stylo does for corpus.lang = "German" with
+# preserve.case = FALSE: digits, punctuation and apostrophes split words.
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+")
+
+DISTANCE_MEASURES = ('delta', 'eder', 'wurzburg')
+
+
+def tokenize(text):
+    """
+    Splits a text into lowercased word tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def join_speech(texts):
+    """
+    Joins the list of speech fragments stored per speaker in the extractors'
+    speech dicts the same way the TXT writers do.
+    """
+    if isinstance(texts, str):
+        return texts
+    return '\n\n'.join(texts)
+
+
+def load_speech_folder(folder):
+    """
+    Reads a folder of exported speech TXT files into a {label: text} dict.
+    The label is the file name without extension, as in the stylo outputs.
+    """
+    texts = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.lower().endswith('.txt'):
+            with open(os.path.join(folder, fname), encoding='utf-8') as f:
+                texts[os.path.splitext(fname)[0]] = f.read()
+    return texts
+
+
+class FrequencyTable:
+    """
+    Speaker x word table of relative frequencies (in percent, as in stylo's
+    table_with_frequencies.txt). Columns are sorted by corpus frequency, so
+    the first n columns are always the n most frequent words.
+    doc_freq holds the number of texts each word occurs in, so that any
+    culling level is a single vectorized mask over the same table.
+    """
+
+    def __init__(self, labels, words, counts, totals):
+        self.labels = labels
+        self.words = words
+        self.counts = counts
+        self.totals = totals
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(totals > 0, 100.0 / totals, 0.0)
+        self.freqs = counts.toarray() * scale[:, None]
+        self.doc_freq = counts.getnnz(axis=0)
+        self._zscores = None
+        # Index of the source speech per row for sampled tables (see sampling)
+        self.sources = None
+
+    def mfw(self, n):
+        """
+        Returns the relative frequency matrix restricted to the n most frequent words.
+        """
+        return self.freqs[:, :n]
+
+    def culling_mask(self, culling=0):
+        """
+        Boolean mask of the words found in at least culling percent of the texts
+        (stylo's culling.min/max; 0 keeps every word).
+        """
+        if culling <= 0:
+            return np.ones(len(self.words), dtype=bool)
+        return self.doc_freq * 100 >= culling * len(self.labels)
+
+    def columns(self, n=None, culling=0):
+        """
+        Returns the column indices of the n most frequent words left after culling,
+        or a slice if nothing is culled.
+        """
+        if culling <= 0:
+            return slice(0, n)
+        return np.flatnonzero(self.culling_mask(culling))[:n]
+
+    def zscores(self, n=None, culling=0):
+        """
+        Column-wise z-scores of the relative frequencies (sample standard
+        deviation, as R's scale()). Constant columns are scored as 0.
+        The z-scores of the whole table are computed once; MFW cutoffs and
+        culling levels only select columns of that base matrix.
+        """
+        if self._zscores is None:
+            freqs = self.freqs
+            mean = freqs.mean(axis=0)
+            std = freqs.std(axis=0, ddof=1) if freqs.shape[0] > 1 else np.zeros(freqs.shape[1])
+            std[std == 0] = 1.0
+            self._zscores = (freqs - mean) / std
+        return self._zscores[:, self.columns(n, culling)]
+
+
+def encode_speeches(speeches, vocabulary=None):
+    """
+    Tokenizes every speech once into an int32 array of token IDs.
+    :param vocabulary: Optional {word: id} dict to extend, so IDs can be shared across calls.
+    :return: (labels, list of ID arrays, vocabulary).
+    """
+    vocabulary = {} if vocabulary is None else vocabulary
+    labels = list(speeches)
+    encoded = []
+    for label in labels:
+        ids = [vocabulary.setdefault(tok, len(vocabulary))
+               for tok in tokenize(join_speech(speeches[label]))]
+        encoded.append(np.asarray(ids, dtype=np.int32))
+    return labels, encoded, vocabulary
+
+
+def table_from_counts(labels, vocabulary, counts, mfw_list_cutoff=5000):
+    """
+    Builds a FrequencyTable from a sparse text x word-ID count matrix,
+    keeping the mfw_list_cutoff most frequent words in corpus-frequency order.
+    """
+    counts = sparse.csc_matrix(counts)
+    totals = np.asarray(counts.sum(axis=1)).ravel()
+    corpus_counts = np.asarray(counts.sum(axis=0)).ravel()
+    # Stable sort keeps first-appearance order among equally frequent words.
+    order = np.argsort(-corpus_counts, kind='stable')[:mfw_list_cutoff]
+    words_by_id = np.empty(counts.shape[1], dtype=object)
+    for word, idx in vocabulary.items():
+        if idx < counts.shape[1]:
+            words_by_id[idx] = word
+
+    return FrequencyTable(labels, list(words_by_id[order]), counts[:, order].tocsr(), totals)
+
+
+def build_frequency_table(speeches, mfw_list_cutoff=5000):
+    """
+    Builds the MFW frequency table directly from a speech dict.
+    :param speeches: Mapping of label (speaker ID, (ID, act) key or file name)
+                     to a text or a list of speech fragments.
+    :param mfw_list_cutoff: Number of most frequent words to keep (stylo's mfw.list.cutoff).
+    :return: A FrequencyTable.
+    """
+    labels, encoded, vocabulary = encode_speeches(speeches)
+    rows = np.repeat(np.arange(len(labels), dtype=np.int64), [len(ids) for ids in encoded])
+    cols = np.concatenate(encoded) if encoded else np.zeros(0, dtype=np.int32)
+    counts = sparse.coo_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(labels), len(vocabulary))
+    )
+    return table_from_counts(labels, vocabulary, counts, mfw_list_cutoff)
+
+
+def eder_weights(n):
+    """
+    Feature weights of Eder's Delta: (n - i + 1) / n for the i-th most frequent word.
+    """
+    return (n - np.arange(n)) / n
+
+
+def delta_distances(zscores, measure='wurzburg'):
+    """
+    Computes the pairwise Delta distance matrix from z-scored frequencies.
+    'delta' is Burrows's Delta (mean absolute z-score difference), 'eder'
+    weights the features by frequency rank and 'wurzburg' is the cosine
+    distance of the z-scores.
+    """
+    n = zscores.shape[1]
+    if measure == 'delta':
+        return cdist(zscores, zscores, 'cityblock') / n
+    if measure == 'eder':
+        weighted = zscores * eder_weights(n)
+        return cdist(weighted, weighted, 'cityblock') / n
+    if measure == 'wurzburg':
+        return cosine_distances(zscores @ zscores.T, (zscores ** 2).sum(axis=1))
+    raise ValueError(f"Unknown distance measure: {measure}")
+
+
+def cosine_distances(dots, sq_norms):
+    """
+    Turns a matrix of dot products and the squared row norms into cosine distances.
+    """
+    norms = np.sqrt(sq_norms)
+    norms[norms == 0] = 1.0
+    distances = 1.0 - dots / np.outer(norms, norms)
+    np.fill_diagonal(distances, 0.0)
+    return np.clip(distances, 0.0, 2.0)
+
+
+def compute_delta(table, mfw, measure='wurzburg', culling=0):
+    """
+    Computes the Delta distance matrix for the mfw most frequent words of a FrequencyTable.
+    """
+    return delta_distances(table.zscores(mfw, culling), measure)
+
+
+def mfw_sweep(table, mfw_min=100, mfw_max=1000, mfw_incr=100, measure='wurzburg', culling=0):
+    """
+    Yields (mfw, distances) for every cutoff of a stylo MFW sweep
+    (mfw.min, mfw.max, mfw.incr), optionally on a culled word list.
+    The z-scores are computed once for the largest cutoff: they are column-wise,
+    so every smaller band is a prefix of the same matrix. Manhattan and cosine
+    partial sums are additive over columns, so each band only adds the
+    contribution of its new columns to the running sums.
+    """
+    if measure not in DISTANCE_MEASURES:
+        raise ValueError(f"Unknown distance measure: {measure}")
+    zscores = table.zscores(mfw_max, culling)
+    mfw_max = zscores.shape[1]
+    n_texts = zscores.shape[0]
+
+    abs_sum = np.zeros((n_texts, n_texts))
+    # Eder's weights (n - i + 1) / n change with n, but the weighted sum splits
+    # into ((n + 1) * sum(d_i) - sum(i * d_i)) / n, both of which are additive.
+    rank_sum = np.zeros((n_texts, n_texts))
+    dots = np.zeros((n_texts, n_texts))
+    sq_norms = np.zeros(n_texts)
+
+    start = 0
+    for mfw in range(mfw_min, mfw_max + 1, mfw_incr):
+        block = zscores[:, start:mfw]
+        if measure == 'wurzburg':
+            dots += block @ block.T
+            sq_norms += (block ** 2).sum(axis=1)
+            distances = cosine_distances(dots, sq_norms)
+        else:
+            abs_sum += cdist(block, block, 'cityblock')
+            if measure == 'eder':
+                ranked = block * np.arange(start + 1, mfw + 1)
+                rank_sum += cdist(ranked, ranked, 'cityblock')
+                distances = ((mfw + 1) * abs_sum - rank_sum) / mfw ** 2
+            else:
+                distances = abs_sum / mfw
+        start = mfw
+        yield mfw, distances
+
+
+def culling_grid(table, mfw_min=100, mfw_max=1000, mfw_incr=100, culling_min=0,
+                 culling_max=0, culling_incr=20, measure='wurzburg'):
+    """
+    Yields (culling, mfw, distances) for the whole MFW x culling grid of a stylo
+    config (culling.min, culling.max, culling.incr). Every cell slices the same
+    z-scored base matrix; each culling level runs one incremental MFW sweep.
+    """
+    for culling in range(culling_min, culling_max + 1, culling_incr):
+        for mfw, distances in mfw_sweep(table, mfw_min, mfw_max, mfw_incr, measure, culling):
+            yield culling, mfw, distances
+
+
+def write_distance_table(path, labels, distances):
+    """
+    Writes a distance matrix as CSV with the speaker labels as header and index.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(',' + ','.join(f'"{label}"' for label in labels) + '\n')
+        for label, row in zip(labels, distances):
+            f.write(f'"{label}",' + ','.join(f'{d:.6f}' for d in row) + '\n')
+
+
+def write_delta_sweep(input_folder, output_folder, mfw_min=100, mfw_max=1000, mfw_incr=100,
+                      measure='wurzburg', culling=0):
+    """
+    Writes one distance table per MFW band for the speech TXT files of a folder.
+    """
+    table = build_frequency_table(load_speech_folder(input_folder))
+    os.makedirs(output_folder, exist_ok=True)
+    for mfw, distances in mfw_sweep(table, mfw_min, mfw_max, mfw_incr, measure, culling):
+        output_path = os.path.join(output_folder, f"distances_{mfw}_MFWs_{measure}.csv")
+        write_distance_table(output_path, table.labels, distances)
+    print(f"Processed: {input_folder}\nResults saved in: {output_folder}")
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+
+    # Settings as in stylo_config.txt
+    mfw_min, mfw_max, mfw_incr = 100, 1000, 100
+    measure = 'wurzburg'
+
+    write_delta_sweep(input_folder, output_folder, mfw_min, mfw_max, mfw_incr, measure)
+
+
+if __name__ == '__main__':
+    main()
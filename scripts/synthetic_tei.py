@@ -0,0 +1,102 @@
+import os
+import random
+from xml.sax.saxutils import escape
+
+ORDINALS = ["Erster", "Zweiter", "Dritter", "Vierter", "Fünfter", "Sechster",
+            "Siebter", "Achter", "Neunter", "Zehnter", "Elfter", "Zwölfter"]
+WORDS = ("ich sie und nicht die das ist der zu du es mir ein sich mit so was den wie "
+         "auf ja aber wenn mich nur noch dich er in nein graf gräfin liebe herz mutter "
+         "kind gott schon doch wohl nun ganz hier immer heute wirklich freilich").split()
+
+
+def _sentence(rng, n_words):
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return ' '.join(words).capitalize() + rng.choice(['.', '!', '?', ' ...'])
+
+
+def generate_play(path, n_speakers=20, n_acts=3, scenes_per_act=6, sps_per_scene=30,
+                  words_per_sp=25, seed=0, title=None):
+    """
+    Writes a synthetic TEI drama shaped like the plays in xml-files/: a particDesc
+    with person and personGrp entries, div[@type="act"] / div[@type="scene"] with
+    ordinal heads, and <sp who> elements with <speaker>, <p> or <l> and inline <stage>.
+    :return: The path of the written file.
+    """
+    rng = random.Random(seed)
+    title = title or f"Synthetisches Lustspiel {seed}"
+    n_groups = max(1, n_speakers // 10)
+    persons = [(f"p{i}", rng.choice(['FEMALE', 'MALE']), f"Figur {i}") for i in range(n_speakers - n_groups)]
+    groups = [(f"g{i}", 'UNKNOWN', f"Gruppe {i}") for i in range(n_groups)]
+    speakers = [pid for pid, _, _ in persons + groups]
+
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<TEI xmlns="http://www.tei-c.org/ns/1.0">',
+           '  <teiHeader>',
+           '    <fileDesc>',
+           '      <titleStmt>',
+           f'        <title type="main">{escape(title)}</title>',
+           '        <title type="sub">Lustspiel</title>',
+           '      </titleStmt>',
+           '    </fileDesc>',
+           '    <profileDesc>',
+           '      <particDesc>',
+           '        <listPerson>']
+    for pid, sex, name in persons:
+        out += [f'          <person xml:id="{pid}" sex="{sex}">',
+                f'            <persName>{escape(name)}</persName>',
+                '          </person>']
+    for gid, sex, name in groups:
+        out += [f'          <personGrp xml:id="{gid}" sex="{sex}">',
+                f'            <name>{escape(name)}</name>',
+                '          </personGrp>']
+    out += ['        </listPerson>',
+            '      </particDesc>',
+            '    </profileDesc>',
+            '  </teiHeader>',
+            '  <text>',
+            '    <body>']
+
+    for act in range(n_acts):
+        out += ['      <div type="act">',
+                f'        <head>{ORDINALS[act % len(ORDINALS)]} Aufzug</head>']
+        for scene in range(scenes_per_act):
+            out += ['        <div type="scene">',
+                    f'          <head>{ORDINALS[scene % len(ORDINALS)]} Scene</head>',
+                    f'          <stage>{escape(_sentence(rng, 8))}</stage>']
+            cast = rng.sample(speakers, min(len(speakers), rng.randint(2, 6)))
+            for _ in range(sps_per_scene):
+                who = rng.choice(cast)
+                if rng.random() < 0.05:
+                    who = f"{who} #{rng.choice(cast)}"
+                tag = 'l' if rng.random() < 0.2 else 'p'
+                text = escape(_sentence(rng, words_per_sp))
+                if rng.random() < 0.3:
+                    text += f' <stage>({escape(_sentence(rng, 4))})</stage> ' + escape(_sentence(rng, 6))
+                out += [f'          <sp who="#{who}">',
+                        f'            <speaker>{escape(who.split()[0])}.</speaker>',
+                        f'            <{tag}>{text}</{tag}>',
+                        '          </sp>']
+            out.append('        </div>')
+        out.append('      </div>')
+    out += ['    </body>', '  </text>', '</TEI>']
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out) + '\n')
+    return path
+
+
+def generate_corpus(folder, n_plays=10, min_speakers=10, max_speakers=40, seed=0, **play_options):
+    """
+    Writes n_plays synthetic plays with between min_speakers and max_speakers
+    characters each to folder.
+    :return: The list of written paths.
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(n_plays):
+        path = os.path.join(folder, f"syn{i:06d}-synthetic-play.tei.xml")
+        generate_play(path, n_speakers=rng.randint(min_speakers, max_speakers),
+                      seed=seed * 100003 + i, **play_options)
+        paths.append(path)
+    return paths
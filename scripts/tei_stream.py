@@ -0,0 +1,158 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+TEI = '{http://www.tei-c.org/ns/1.0}'
+NS = {'tei': 'http://www.tei-c.org/ns/1.0'}
+
+# Position of a <sp> in the play. The indices count the act and scene divs in
+# document order (0 = outside any act/scene); the heads are the raw text of
+# the first <head> child of the enclosing act and scene div.
+SpeechContext = namedtuple('SpeechContext', ['act_index', 'act_head', 'scene_index', 'scene_head'])
+
+# Whitespace-separated tokens, as counted by str.split()
+WHITESPACE_TOKEN = re.compile(r'\S+')
+
+
+def extract_text_without_stage(elem, count_tokens=False):
+    """
+    Extracts the text of an element, ignoring content from <stage> and <speaker> elements.
+    Walks the subtree iteratively and collects the fragments in a list, so the
+    cost is linear in the size of the text however deeply the markup is nested.
+    :param count_tokens: Also count whitespace-separated tokens while collecting.
+    :return: The text, or (text, token count) if count_tokens is set.
+    """
+    parts = []
+    if elem.text:
+        parts.append(elem.text)
+    # Each entry holds the remaining children of an open element and the
+    # element itself, whose tail follows once its children are done.
+    stack = [(iter(elem), None)]
+    while stack:
+        children, owner = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if owner is not None and owner.tail:
+                parts.append(owner.tail)
+        elif child.tag.endswith('stage') or child.tag.endswith('speaker'):
+            if child.tail:
+                parts.append(child.tail)
+        else:
+            if child.text:
+                parts.append(child.text)
+            stack.append((iter(child), child))
+
+    text = ''.join(parts)
+    if not count_tokens:
+        return text
+
+    tokens = 0
+    in_token = False
+    for part in parts:
+        n = len(WHITESPACE_TOKEN.findall(part))
+        # A token split across markup (e.g. W<hi>ort</hi>) is counted once.
+        if n and in_token and not part[0].isspace():
+            n -= 1
+        tokens += n
+        in_token = not part[-1].isspace()
+    return text, tokens
+
+
+def sp_speakers(sp):
+    """
+    Returns the speaker IDs of a <sp> element from its who attribute (without '#').
+    """
+    return [i.strip().lstrip('#') for i in sp.get('who', '').split() if i.strip()]
+
+
+def play_id(file_path):
+    """
+    Returns the play identifier of a TEI file, i.e. its file name without the
+    .tei.xml/.xml extension (e.g. ger000704-ebner-eschenbach-die-selbstsuechtigen).
+    """
+    name = os.path.basename(file_path)
+    for ext in ('.tei.xml', '.xml'):
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+class TeiStream:
+    """
+    Single-pass streaming reader for TEI dramas built on ET.iterparse.
+
+    Iterating yields ('header', teiHeader, None) once the header is complete and
+    ('sp', sp, SpeechContext) for every finished <sp>, in document order.
+    Elements are cleared and detached from the tree as soon as they have been
+    handed out, so memory stays flat regardless of the size of the play.
+    After iteration, act_count holds the number of div[@type="act"] elements
+    and element_count the number of parsed elements.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.act_count = 0
+        self.scene_count = 0
+        self.element_count = 0
+
+    def __iter__(self):
+        self.act_count = 0
+        self.scene_count = 0
+        self.element_count = 0
+        stack = []
+        # Open divs as [type, index, head] so heads can be filled in when read.
+        divs = []
+        # Number of open elements whose subtree is still needed (header, sp).
+        keep = 0
+
+        for event, elem in ET.iterparse(self.file_path, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                stack.append(elem)
+                if tag == TEI + 'div':
+                    div_type = elem.get('type')
+                    if div_type == 'act':
+                        self.act_count += 1
+                        divs.append(['act', self.act_count, None])
+                    elif div_type == 'scene':
+                        self.scene_count += 1
+                        divs.append(['scene', self.scene_count, None])
+                    else:
+                        divs.append([div_type, 0, None])
+                elif tag == TEI + 'teiHeader' or tag == TEI + 'sp':
+                    keep += 1
+                continue
+
+            stack.pop()
+            parent = stack[-1] if stack else None
+            self.element_count += 1
+
+            if tag == TEI + 'teiHeader':
+                keep -= 1
+                yield 'header', elem, None
+            elif tag == TEI + 'sp':
+                keep -= 1
+                yield 'sp', elem, self._context(divs)
+            elif tag == TEI + 'head' and keep == 0 and parent is not None and parent.tag == TEI + 'div':
+                div = divs[-1]
+                if div[2] is None:
+                    div[2] = elem.text or ''
+            elif tag == TEI + 'div':
+                divs.pop()
+
+            if keep == 0 and parent is not None:
+                elem.clear()
+                parent.remove(elem)
+
+    @staticmethod
+    def _context(divs):
+        act_index, act_head, scene_index, scene_head = 0, None, 0, None
+        for div_type, index, head in divs:
+            if div_type == 'act':
+                act_index, act_head = index, head
+                scene_index, scene_head = 0, None
+            elif div_type == 'scene':
+                scene_index, scene_head = index, head
+        return SpeechContext(act_index, act_head or None, scene_index, scene_head or None)
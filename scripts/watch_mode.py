@@ -0,0 +1,351 @@
+import os
+import time
+from collections import Counter
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from batch_extract import list_xml_files, update_plays
+from speech_output import read_manifest
+from stylometry import (DISTANCE_MEASURES, build_frequency_table, eder_weights, join_speech, tokenize,
+                        write_distance_table)
+from tei_stream import play_id
+
+
+class IncrementalDelta:
+    """
+    Delta distance matrix that can be updated for a few speakers at a time.
+
+    The word counts of every speaker are kept, so an update only tokenizes the
+    changed speeches. It then checks the two things a change can invalidate:
+    - the MFW list: if a full rebuild would select other words (or, for Eder's
+      Delta, rank them differently), everything is rebuilt;
+    - the z-score statistics: the column means and standard deviations are
+      recomputed from the kept frequency rows. If any of them moved by more
+      than tolerance (mean shift in standard deviations, or relative change of
+      the standard deviation), all z-scores and distances are recomputed from
+      those rows (no tokenizing).
+    Otherwise only the changed speakers' rows and columns of the distance matrix
+    are computed, with the statistics of the last full computation. The matrix
+    is then approximate, within tolerance of the exact z-scores; tolerance=0
+    always gives the result of a full rebuild.
+    """
+
+    def __init__(self, speeches, mfw=1000, measure='wurzburg', culling=0, tolerance=0.01):
+        if measure not in DISTANCE_MEASURES:
+            raise ValueError(f"Unknown distance measure: {measure}")
+        self.mfw = mfw
+        self.measure = measure
+        self.culling = culling
+        self.tolerance = tolerance
+        self.refresh(speeches)
+
+    def refresh(self, speeches):
+        """
+        Rebuilds the word counts, MFW list, z-score statistics and distances from {label: text}.
+        """
+        self.speeches = dict(speeches)
+        self.counts = {label: Counter(tokenize(join_speech(text))) for label, text in self.speeches.items()}
+        self.corpus = Counter()
+        self.doc_freq = Counter()
+        for counts in self.counts.values():
+            self.corpus.update(counts)
+            self.doc_freq.update(counts.keys())
+
+        table = build_frequency_table(self.speeches)
+        columns = table.columns(self.mfw, self.culling)
+        self.words = list(np.asarray(table.words, dtype=object)[columns])
+        self.column_of = {word: j for j, word in enumerate(self.words)}
+        self.labels = list(table.labels)
+        self.freqs = table.freqs[:, columns]
+        self.standardize()
+
+    def standardize(self):
+        """
+        Recomputes the z-score statistics, all z-scores and all distances from the frequency rows.
+        """
+        self.mean, self.std = self.statistics(self.freqs)
+        self.zscores = (self.freqs - self.mean) / self.std
+        self.distances = self.pair_distances(self.zscores, self.zscores)
+        np.fill_diagonal(self.distances, 0.0)
+
+    @staticmethod
+    def statistics(freqs):
+        """
+        Column means and sample standard deviations (constant columns as 1), as FrequencyTable.zscores.
+        """
+        mean = freqs.mean(axis=0)
+        std = freqs.std(axis=0, ddof=1) if freqs.shape[0] > 1 else np.zeros(freqs.shape[1])
+        std[std == 0] = 1.0
+        return mean, std
+
+    def frequency_rows(self, labels):
+        """
+        Relative frequencies (in percent) of the MFW list for the given speakers.
+        """
+        rows = np.zeros((len(labels), len(self.words)))
+        for i, label in enumerate(labels):
+            counts = self.counts[label]
+            for word, count in counts.items():
+                j = self.column_of.get(word)
+                if j is not None:
+                    rows[i, j] = count
+            total = sum(counts.values())
+            if total:
+                rows[i] *= 100.0 / total
+        return rows
+
+    def pair_distances(self, a, b):
+        """
+        Delta distances between the z-scored rows of a and b (as delta_distances).
+        """
+        n = a.shape[1]
+        if self.measure == 'delta':
+            return cdist(a, b, 'cityblock') / n
+        if self.measure == 'eder':
+            weights = eder_weights(n)
+            return cdist(a * weights, b * weights, 'cityblock') / n
+        norms_a = np.sqrt((a ** 2).sum(axis=1))
+        norms_b = np.sqrt((b ** 2).sum(axis=1))
+        norms_a[norms_a == 0] = 1.0
+        norms_b[norms_b == 0] = 1.0
+        return np.clip(1.0 - (a @ b.T) / np.outer(norms_a, norms_b), 0.0, 2.0)
+
+    def mfw_unchanged(self):
+        """
+        Whether a full rebuild would select the same MFW list (in the same order
+        for Eder's Delta). Like build_frequency_table, words are ranked by corpus
+        count, ties by first appearance in the speeches (in label order); the
+        counters keep each speech's words in order of first appearance.
+        """
+        def kept(word):
+            return self.culling <= 0 or self.doc_freq[word] * 100 >= self.culling * len(self.labels)
+
+        if not all(self.corpus[word] > 0 for word in self.words):
+            return False
+        floor = min((self.corpus[word] for word in self.words), default=0) if len(self.words) >= self.mfw else 1
+        candidates = {word for word, count in self.corpus.items() if count >= floor and kept(word)}
+        first = {}
+        for i, label in enumerate(self.labels):
+            for j, word in enumerate(self.counts[label]):
+                if word in candidates and word not in first:
+                    first[word] = (i, j)
+            if len(first) == len(candidates):
+                break
+        expected = sorted(candidates, key=lambda word: (-self.corpus[word], first[word]))[:self.mfw]
+        if self.measure == 'eder':
+            return expected == self.words
+        return set(expected) == set(self.words)
+
+    def update(self, removed=(), changed=None):
+        """
+        Removes the speeches with labels in removed and adds or replaces those in
+        changed ({label: text}). Replaced speeches keep their position, new ones
+        are appended.
+        :return: 'rebuilt' (MFW list changed), 'standardized' (statistics moved
+                 beyond tolerance) or 'updated' (only the changed rows/columns).
+        """
+        changed = changed or {}
+        drop = set(removed) - set(changed)
+        for label in set(removed) | set(changed):
+            counts = self.counts.pop(label, None)
+            if counts is not None:
+                self.corpus.subtract(counts)
+                self.doc_freq.subtract(counts.keys())
+        for label, text in changed.items():
+            self.counts[label] = Counter(tokenize(join_speech(text)))
+            self.corpus.update(self.counts[label])
+            self.doc_freq.update(self.counts[label].keys())
+        self.corpus = +self.corpus
+        self.doc_freq = +self.doc_freq
+
+        old_labels = self.labels
+        self.labels = ([label for label in old_labels if label not in drop]
+                       + [label for label in changed if label not in set(old_labels)])
+        self.speeches = {label: changed[label] if label in changed else self.speeches[label]
+                         for label in self.labels}
+        if not self.mfw_unchanged():
+            self.refresh(self.speeches)
+            return 'rebuilt'
+
+        old_index = {label: i for i, label in enumerate(old_labels)}
+        kept = [i for i, label in enumerate(self.labels) if label not in changed]
+        kept_old = [old_index[self.labels[i]] for i in kept]
+        new = [i for i, label in enumerate(self.labels) if label in changed]
+        freqs = np.empty((len(self.labels), len(self.words)))
+        freqs[kept] = self.freqs[kept_old]
+        freqs[new] = self.frequency_rows([self.labels[i] for i in new])
+        self.freqs = freqs
+        mean, std = self.statistics(self.freqs)
+        drift = max(np.max(np.abs(mean - self.mean) / self.std, initial=0.0),
+                    np.max(np.abs(std / self.std - 1.0), initial=0.0))
+        if drift > self.tolerance:
+            self.standardize()
+            return 'standardized'
+
+        zscores = np.empty_like(freqs)
+        zscores[kept] = self.zscores[kept_old]
+        zscores[new] = (freqs[new] - self.mean) / self.std
+        distances = np.empty((len(self.labels), len(self.labels)))
+        distances[np.ix_(kept, kept)] = self.distances[np.ix_(kept_old, kept_old)]
+        cross = self.pair_distances(zscores[new], zscores)
+        distances[new, :] = cross
+        distances[:, new] = cross.T
+        distances[new, new] = 0.0
+        self.zscores = zscores
+        self.distances = distances
+        return 'updated'
+
+
+def snapshot(input_folder):
+    """
+    Returns {path: (mtime_ns, size)} of the XML files in a folder.
+    """
+    state = {}
+    for path in list_xml_files(input_folder):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        state[path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def _manifest_speeches(manifest_path, plays=None):
+    """
+    Reads the speeches of the given plays (all if None) from the files listed
+    in a full-extraction manifest, keyed by file name without extension.
+    """
+    speeches = {}
+    by_play = {}
+    for row in read_manifest(manifest_path):
+        if plays is not None and row['play'] not in plays:
+            continue
+        label = os.path.splitext(os.path.basename(row['output_path']))[0]
+        with open(row['output_path'], encoding='utf-8') as f:
+            speeches[label] = f.read()
+        by_play.setdefault(row['play'], []).append(label)
+    return speeches, by_play
+
+
+class PlayWatcher:
+    """
+    Re-extracts and re-analyses TEI plays as they are edited. The folder is
+    polled every interval seconds; once no file has changed for debounce
+    seconds, only the changed plays are extracted again (see update_plays) and
+    the distance matrix is updated for their speakers (see IncrementalDelta).
+    A play that cannot be parsed, e.g. because it is saved half-way, keeps its
+    previous outputs and distances until it is saved again.
+    """
+
+    def __init__(self, input_folder, output_folder, modes=('full', 'segmented'), mfw=1000,
+                 measure='wurzburg', interval=1.0, debounce=2.0, tolerance=0.01):
+        self.input_folder = input_folder
+        self.output_folder = output_folder
+        self.modes = modes
+        self.mfw = mfw
+        self.measure = measure
+        self.interval = interval
+        self.debounce = debounce
+        self.tolerance = tolerance
+        self.analysis = None
+        self.play_labels = {}
+
+    def mode_folder(self, mode):
+        return os.path.join(self.output_folder, f"{mode}-speeches")
+
+    def extract(self, plays):
+        """
+        Re-extracts the given plays in every mode.
+        :return: (manifest path of the full extraction or None, set of plays that failed).
+        """
+        manifest = None
+        failed = set()
+        for mode in self.modes:
+            path, errors = update_plays(self.input_folder, self.mode_folder(mode), plays, mode,
+                                        per_play_folders=(mode == 'segmented'))
+            failed.update(errors)
+            if mode == 'full':
+                manifest = path
+        return manifest, failed
+
+    def write_distances(self):
+        folder = os.path.join(self.output_folder, 'analysis')
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"distances_{self.mfw}_MFWs_{self.measure}.csv")
+        write_distance_table(path, self.analysis.labels, self.analysis.distances)
+        return path
+
+    def rebuild(self):
+        """
+        Extracts all plays (unchanged ones are cached) and builds the analysis from scratch.
+        """
+        manifest, _ = self.extract({play_id(path) for path in list_xml_files(self.input_folder)})
+        if manifest is None:
+            return
+        speeches, self.play_labels = _manifest_speeches(manifest)
+        self.analysis = IncrementalDelta(speeches, self.mfw, self.measure, tolerance=self.tolerance)
+        self.write_distances()
+
+    def handle(self, plays):
+        """
+        Re-extracts the changed (or removed) plays and updates their distance entries.
+        """
+        start = time.perf_counter()
+        manifest, failed = self.extract(plays)
+        plays = set(plays) - failed
+        if manifest is None or self.analysis is None or not plays:
+            return
+        changed, labels = _manifest_speeches(manifest, plays)
+        removed = [label for play in plays for label in self.play_labels.get(play, [])]
+        result = self.analysis.update(removed, changed)
+        for play in plays:
+            self.play_labels.pop(play, None)
+        self.play_labels.update(labels)
+        self.write_distances()
+        print(f"Distances {result}: {', '.join(sorted(plays))} in {time.perf_counter() - start:.2f} s")
+
+    def run(self, iterations=None):
+        """
+        Builds everything once, then polls for changes (forever, or for a number
+        of polling iterations).
+        """
+        self.rebuild()
+        previous = snapshot(self.input_folder)
+        pending = set()
+        last_change = None
+        count = 0
+        while iterations is None or count < iterations:
+            count += 1
+            time.sleep(self.interval)
+            current = snapshot(self.input_folder)
+            if current != previous:
+                pending |= {play_id(path) for path in set(current) | set(previous)
+                            if current.get(path) != previous.get(path)}
+                previous = current
+                last_change = time.monotonic()
+            if pending and time.monotonic() - last_change >= self.debounce:
+                self.handle(pending)
+                pending = set()
+
+
+def main():
+    # Configuration: Paths for input and output files
+    input_folder = r"E:\python\input"
+    output_folder = r"E:\python\output"
+
+    # Watch settings
+    mfw = 1000
+    measure = 'wurzburg'
+    interval, debounce = 1.0, 2.0
+
+    print(f"Watching: {input_folder} (Ctrl+C to stop)")
+    try:
+        PlayWatcher(input_folder, output_folder, mfw=mfw, measure=measure,
+                    interval=interval, debounce=debounce).run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
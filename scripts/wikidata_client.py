@@ -0,0 +1,180 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+WIKIDATA_API_URL = "https://www.wikidata.org/w/api.php"
+# wbgetentities accepts at most 50 IDs per request for regular users.
+MAX_IDS_PER_REQUEST = 50
+USER_AGENT = "style-ebner-eschenbach/0.5 (https://github.com/erre1998/style_ebner-eschenbach)"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to capacity requests and
+    rate requests per second on average.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of entity JSON with a time-to-live in seconds.
+    Only used from the thread that created the client.
+    """
+
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entities (id TEXT PRIMARY KEY, fetched REAL, data TEXT)"
+        )
+
+    def get_many(self, ids):
+        """
+        Returns {id: entity} for all IDs with a cache entry younger than the TTL.
+        """
+        found = {}
+        oldest = time.time() - self.ttl
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT id, data FROM entities WHERE fetched >= ? AND id IN ({','.join('?' * len(chunk))})",
+                [oldest] + chunk,
+            )
+            found.update((entity_id, json.loads(data)) for entity_id, data in rows)
+        return found
+
+    def put_many(self, entities):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entities (id, fetched, data) VALUES (?, ?, ?)",
+                [(entity_id, now, json.dumps(entity)) for entity_id, entity in entities.items()],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class WikidataClient:
+    """
+    Fetches Wikidata entities in batches of up to 50 IDs per wbgetentities call,
+    on a thread pool sharing one pooled HTTP session. Requests are rate-limited
+    by a token bucket, retried with exponential backoff on network errors,
+    429 and 5xx responses, and answered from a persistent cache when possible.
+    :param api_url: MediaWiki API endpoint (point it to a local stub server for tests).
+    :param cache_path: SQLite file for cached responses, or None to disable caching.
+    :param ttl: Maximum age of cached entities in seconds.
+    :param rate: Average number of requests per second.
+    """
+
+    def __init__(self, api_url=WIKIDATA_API_URL, cache_path='wikidata-cache.sqlite',
+                 ttl=7 * 24 * 3600, rate=5.0, workers=4, max_retries=5, backoff=1.0,
+                 timeout=30, props='claims|labels'):
+        self.api_url = api_url
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.props = props
+        self.bucket = TokenBucket(rate)
+        self.cache = ResponseCache(cache_path, ttl) if cache_path else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _request(self, ids):
+        """
+        Fetches one batch of IDs, retrying transient failures with backoff.
+        """
+        params = {'action': 'wbgetentities', 'ids': '|'.join(ids), 'format': 'json'}
+        if self.props:
+            params['props'] = self.props
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                    retry_after = response.headers.get('Retry-After')
+                    if retry_after and retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                data = response.json()
+                if 'error' in data:
+                    raise requests.RequestException(data['error'].get('info', data['error']))
+                return data.get('entities', {})
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(delay)
+        return {}
+
+    def get_entities(self, ids):
+        """
+        Returns {id: entity JSON} for the given IDs. Entities that do not exist
+        are returned with a 'missing' key, as in the API response; batches that
+        fail after all retries are reported and left out.
+        """
+        ids = list(dict.fromkeys(i.strip() for i in ids if i and i.strip()))
+        entities = self.cache.get_many(ids) if self.cache is not None else {}
+        todo = [i for i in ids if i not in entities]
+        batches = [todo[i:i + MAX_IDS_PER_REQUEST] for i in range(0, len(todo), MAX_IDS_PER_REQUEST)]
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            futures = [(batch, executor.submit(self._request, batch)) for batch in batches]
+            for batch, future in futures:
+                try:
+                    fetched.update(future.result())
+                except requests.RequestException as e:
+                    print(f"Error fetching {batch[0]}..{batch[-1]} ({len(batch)} IDs): {e}")
+
+        if self.cache is not None and fetched:
+            self.cache.put_many(fetched)
+        entities.update(fetched)
+        return {i: entities[i] for i in ids if i in entities}
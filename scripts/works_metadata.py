@@ -0,0 +1,151 @@
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+# Column names differ between the two CSVs; both are mapped to one schema.
+COLUMN_ALIASES = {
+    'author': ['author-name', 'author'],
+    'year': ['year-normalized', 'year'],
+}
+VALID_GENRES = ['comedy', 'tragedy', 'na']
+CACHE_VERSION = 1
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_works_file(path):
+    """
+    Reads one works list (CSV or Excel) with explicit dtypes and normalizes it to
+    the columns author, title, year, decade and genre.
+    """
+    try:
+        if path.lower().endswith('.xlsx'):
+            df = pd.read_excel(path, dtype=str)
+        elif path.lower().endswith('.csv'):
+            df = pd.read_csv(path, encoding='utf-8', dtype=str, keep_default_na=False)
+        else:
+            raise ValueError(f"Nicht unterstütztes Dateiformat: {path}")
+    except Exception as e:
+        raise RuntimeError(f"Fehler beim Einlesen der Datei {path}: {e}")
+
+    columns = {}
+    for target, aliases in COLUMN_ALIASES.items():
+        source = next((alias for alias in aliases if alias in df.columns), None)
+        if source is None:
+            raise ValueError(f"Die Spalte '{aliases[0]}' fehlt in der Datei {path}.")
+        columns[target] = df[source]
+    if 'genre' not in df.columns:
+        raise ValueError(f"Die Spalte 'genre' wurde in der Datei {path} nicht gefunden.")
+
+    # Leere Strings und NaN auf 'na' setzen, alles klein schreiben
+    genre = df['genre'].fillna('').str.strip().str.lower().replace('', 'na')
+    year = pd.to_numeric(columns['year'], errors='coerce').astype('Int64')
+    author = columns['author'].replace('', pd.NA)
+
+    return pd.DataFrame({
+        'author': author,
+        'title': df['title'] if 'title' in df.columns else pd.NA,
+        'year': year,
+        'decade': (year // 10) * 10,
+        'genre': genre,
+    })
+
+
+def load_works(path_main, path_ger, cache_path=None):
+    """
+    Loads both works lists (not in / in GerDraCor) into one normalized frame with
+    categorical author, genre and decade columns and a boolean in_dracor column.
+    The frame is cached as a pickle next to path_main (or at cache_path) and
+    reused until one of the source files changes (mtime/size, then content hash).
+    """
+    if cache_path is None:
+        cache_path = os.path.join(os.path.dirname(os.path.abspath(path_main)), '.works-metadata.pkl')
+    sources = [_source_signature(path_main), _source_signature(path_ger)]
+
+    cached = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            cached = None
+    if cached is not None and cached.get('version') == CACHE_VERSION:
+        if cached['sources'] == sources:
+            return cached['frame']
+        # Touched but unchanged files (e.g. after a checkout) still hit the cache
+        hashes = [_file_hash(path_main), _file_hash(path_ger)]
+        if cached.get('hashes') == hashes:
+            _write_cache(cache_path, sources, hashes, cached['frame'])
+            return cached['frame']
+
+    df_main = read_works_file(path_main)
+    df_ger = read_works_file(path_ger)
+    df_main['in_dracor'] = False
+    df_ger['in_dracor'] = True
+    frame = pd.concat([df_main, df_ger], ignore_index=True)
+    for column in ('author', 'genre', 'decade'):
+        frame[column] = frame[column].astype('category')
+
+    _write_cache(cache_path, sources, [_file_hash(path_main), _file_hash(path_ger)], frame)
+    return frame
+
+
+def _write_cache(cache_path, sources, hashes, frame):
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'sources': sources, 'hashes': hashes, 'frame': frame},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Cache konnte nicht geschrieben werden ({cache_path}): {e}")
+
+
+def aggregate_counts(frame):
+    """
+    Counts works per (in_dracor, genre, author, decade) in a single groupby.
+    All chart tables are derived from this Series by summing over levels.
+    """
+    return frame.groupby(['in_dracor', 'genre', 'author', 'decade'], observed=True, dropna=False).size()
+
+
+def _split_by_source(counts, level):
+    table = counts.groupby(level=['in_dracor', level], observed=True).sum().unstack('in_dracor', fill_value=0)
+    table = table.reindex(columns=[False, True], fill_value=0)
+    return table[False], table[True]
+
+
+def genre_counts(counts, genres=VALID_GENRES):
+    """
+    Returns (not in GerDraCor, in GerDraCor) works per genre, reindexed to genres.
+    """
+    main, ger = _split_by_source(counts, 'genre')
+    return main.reindex(genres, fill_value=0), ger.reindex(genres, fill_value=0)
+
+
+def top_author_counts(counts, n=10):
+    """
+    Returns the n authors with most works and their (not in, in GerDraCor) counts.
+    """
+    main, ger = _split_by_source(counts, 'author')
+    top = (main + ger).sort_values(ascending=False, kind='stable').head(n).index.tolist()
+    return top, main.reindex(top, fill_value=0), ger.reindex(top, fill_value=0)
+
+
+def decade_counts(counts):
+    """
+    Returns all decades with works and their (not in, in GerDraCor) counts.
+    """
+    main, ger = _split_by_source(counts, 'decade')
+    decades = sorted(int(d) for d in main.index.union(ger.index) if pd.notna(d))
+    return (decades, [int(main.get(d, 0)) for d in decades], [int(ger.get(d, 0)) for d in decades])
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from extract_author_wikidata_ids import resolve_genders  # noqa: E402
+
+
+def claim(property_key, value_id):
+    return {property_key: [{'mainsnak': {'datavalue': {'value': {'id': value_id}}}}]}
+
+
+class DroppingClient:
+    """
+    Client that answers from a dict but leaves out some entities, like
+    WikidataClient.get_entities does for batches that still fail after retries.
+    """
+
+    def __init__(self, entities, dropped):
+        self.entities = entities
+        self.dropped = set(dropped)
+
+    def get_entities(self, ids):
+        return {i: self.entities[i] for i in ids if i in self.entities and i not in self.dropped}
+
+
+def test_failed_gender_lookup_is_kept_unresolved():
+    entities = {
+        'Q1': {'claims': claim('P21', 'Q6581072')},
+        'Q2': {'claims': claim('P21', 'Q48270')},
+        'Q48270': {'labels': {'en': {'value': 'non-binary'}}},
+    }
+    client = DroppingClient(entities, dropped={'Q48270'})
+    assert resolve_genders(client, {'Q1', 'Q2'}) == {'Q1': 'female', 'Q2': 'Q48270'}
+
+
+def test_failed_person_lookup_is_left_out():
+    entities = {'Q1': {'claims': claim('P21', 'Q6581072')}, 'Q2': {'claims': claim('P21', 'Q6581097')}}
+    client = DroppingClient(entities, dropped={'Q2'})
+    assert resolve_genders(client, {'Q1', 'Q2'}) == {'Q1': 'female'}